@@ -0,0 +1,101 @@
+import numpy as np
+from bitboard import COLORS, SYMBOLS
+from pieces import (
+    DIAGONAL,
+    KING_POSSIBLE_POS,
+    KNIGHT_POSSIBLE_POS,
+    ORTHOGONAL,
+    PAWN_POSSIBLE_STRIKES,
+    invert_pos,
+)
+
+# int8 code of every piece, white pieces are positive and black pieces negative, 0 is empty
+PIECE_CODES: dict[tuple[str, str], int] = {
+    (color, sym): (index + 1) * (1 if color == "white" else -1)
+    for color in COLORS
+    for index, sym in enumerate(SYMBOLS)
+}
+CODE_SYMBOLS: dict[int, tuple[str, str]] = {
+    code: piece for piece, code in PIECE_CODES.items()
+}
+
+# offsets a pawn strikes to, by color
+PAWN_STRIKES: dict[str, tuple[tuple[int, int], ...]] = {
+    "white": PAWN_POSSIBLE_STRIKES,
+    "black": tuple(invert_pos(PAWN_POSSIBLE_STRIKES)),
+}
+
+
+def shift(array: np.typing.NDArray, dy: int, dx: int) -> np.typing.NDArray:
+    """
+    moves the content of the last two axes by (dy, dx), cells pushed over the edge are dropped
+
+    :param array: boards of shape (..., size, size)
+    :returns: a new array of the same shape, empty cells are 0
+    """
+    rows, cols = array.shape[-2:]
+    shifted = np.zeros_like(array)
+    if abs(dy) >= rows or abs(dx) >= cols:
+        return shifted
+    shifted[..., max(dy, 0) : rows + min(dy, 0), max(dx, 0) : cols + min(dx, 0)] = (
+        array[..., max(-dy, 0) : rows - max(dy, 0), max(-dx, 0) : cols - max(dx, 0)]
+    )
+    return shifted
+
+
+def get_color_attack_map(boards: np.typing.NDArray, color: str) -> np.typing.NDArray:
+    """
+    :param boards: int8 boards (see PIECE_CODES) of shape (..., size, size)
+    :param color: color of the attacking pieces
+    :returns: the number of pieces of the color attacking every cell, a slider attacks every cell
+        of its rays up to and including the first piece in the way
+    """
+    counts = np.zeros(boards.shape, dtype=np.uint8)
+
+    def pieces(sym: str) -> np.typing.NDArray:
+        return (boards == PIECE_CODES[(color, sym)]).astype(np.uint8)
+
+    for sym, offsets in (
+        ("N", KNIGHT_POSSIBLE_POS),
+        ("K", KING_POSSIBLE_POS),
+        ("P", PAWN_STRIKES[color]),
+    ):
+        mask = pieces(sym)
+        for dy, dx in offsets:
+            counts += shift(mask, dy, dx)
+
+    empty = (boards == 0).astype(np.uint8)
+    queens = pieces("Q")
+    for sym, directions in (("T", ORTHOGONAL), ("B", DIAGONAL)):
+        sliders = pieces(sym) + queens
+        for dy, dx in directions:
+            # every step the rays move one cell on and stop behind the first piece in the way
+            rays = shift(sliders, dy, dx)
+            while rays.any():
+                counts += rays
+                rays = shift(rays * empty, dy, dx)
+    return counts
+
+
+def get_attack_maps(boards: np.typing.NDArray) -> np.typing.NDArray:
+    """
+    attack counts of both colors for one board or a stack of thousands of boards in one call
+
+    :param boards: int8 boards (see PIECE_CODES) of shape (size, size) or (n, size, size)
+    :returns: an array of shape (..., 2, size, size), index 0 holds the counts of white
+        and index 1 those of black (same order as COLORS)
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    return np.stack([get_color_attack_map(boards, color) for color in COLORS], axis=-3)
+
+
+def get_kill_maps(boards: np.typing.NDArray) -> np.typing.NDArray:
+    """
+    :param boards: int8 boards (see PIECE_CODES) of shape (size, size) or (n, size, size)
+    :returns: a bool array of shape (..., 2, size, size) with the enemy pieces each color attacks,
+        en passant is not part of it because the boards don't know which pawn moved last
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    attack_maps = get_attack_maps(boards)
+    enemies = np.stack([boards < 0, boards > 0], axis=-3)
+    return (attack_maps > 0) & enemies
@@ -0,0 +1,105 @@
+from functools import lru_cache
+from bitboard import pos_to_square
+from pieces import (
+    ORTHOGONAL,
+    DIAGONAL,
+    PAWN_POSSIBLE_POS,
+    PAWN_POSSIBLE_STRIKES,
+    gen_possible_pos_knight,
+    gen_possible_pos_king,
+    invert_pos,
+)
+
+
+class AttackTables:
+    """
+    squares a piece can reach from every square of an empty board, computed once per board size.
+    Every table is indexed by the square (see bitboard.pos_to_square), rays and step lists hold the
+    target squares ordered by distance so move generation can stop at the first blocker,
+    the *_attacks tables hold the same squares as bitboards
+    """
+
+    def __init__(self, game_size: int):
+        self.game_size = game_size
+        squares = range(game_size * game_size)
+
+        self.rays: dict[tuple[int, int], tuple[tuple[int, ...], ...]] = {
+            direction: tuple(self.gen_ray(square, direction) for square in squares)
+            for direction in ORTHOGONAL + DIAGONAL
+        }
+
+        knight_offsets = gen_possible_pos_knight()
+        king_offsets = gen_possible_pos_king()
+        self.knight_rays = tuple(
+            self.gen_steps(square, knight_offsets) for square in squares
+        )
+        self.king_rays = tuple(
+            self.gen_steps(square, king_offsets) for square in squares
+        )
+        self.knight_attacks = tuple(
+            to_bitboard(sq for ray in rays for sq in ray) for rays in self.knight_rays
+        )
+
+        pawn_offsets = {
+            "white": (PAWN_POSSIBLE_POS, PAWN_POSSIBLE_STRIKES),
+            "black": (invert_pos(PAWN_POSSIBLE_POS), invert_pos(PAWN_POSSIBLE_STRIKES)),
+        }
+        self.pawn_pushes: dict[str, tuple[tuple[int, ...], ...]] = {}
+        self.pawn_strike_rays: dict[str, tuple[tuple[tuple[int], ...], ...]] = {}
+        self.pawn_attacks: dict[str, tuple[int, ...]] = {}
+        for color, (push_offsets, strike_offsets) in pawn_offsets.items():
+            # the pushes of a pawn form a single ray, the double step is cut off once it moved
+            self.pawn_pushes[color] = tuple(
+                tuple(sq for ray in self.gen_steps(square, push_offsets) for sq in ray)
+                for square in squares
+            )
+            self.pawn_strike_rays[color] = tuple(
+                self.gen_steps(square, strike_offsets) for square in squares
+            )
+            self.pawn_attacks[color] = tuple(
+                to_bitboard(sq for ray in rays for sq in ray)
+                for rays in self.pawn_strike_rays[color]
+            )
+
+    def on_board(self, row: int, col: int) -> bool:
+        return 0 <= row < self.game_size and 0 <= col < self.game_size
+
+    def gen_ray(self, square: int, direction: tuple[int, int]) -> tuple[int, ...]:
+        """
+        :returns: squares from the square (excluded) to the edge of the board in the direction
+        """
+        row, col = divmod(square, self.game_size)
+        ray = []
+        row, col = row + direction[0], col + direction[1]
+        while self.on_board(row, col):
+            ray.append(pos_to_square((row, col), self.game_size))
+            row, col = row + direction[0], col + direction[1]
+        return tuple(ray)
+
+    def gen_steps(
+        self, square: int, offsets: list[tuple[int, int]]
+    ) -> tuple[tuple[int], ...]:
+        """
+        :returns: a ray of length one for every offset that stays on the board
+        """
+        row, col = divmod(square, self.game_size)
+        return tuple(
+            (pos_to_square((row + y, col + x), self.game_size),)
+            for y, x in offsets
+            if self.on_board(row + y, col + x)
+        )
+
+
+def to_bitboard(squares) -> int:
+    bitboard = 0
+    for square in squares:
+        bitboard |= 1 << square
+    return bitboard
+
+
+@lru_cache(maxsize=None)
+def get_attack_tables(game_size: int) -> AttackTables:
+    """
+    :returns: the AttackTables for the board size, shared by every board of that size
+    """
+    return AttackTables(game_size)
@@ -0,0 +1,242 @@
+import random
+from collections import Counter
+from typing import Callable, Iterable, Sequence
+import numpy as np
+from attack_maps import PIECE_CODES, get_attack_maps
+from game import START_FEN, Game
+
+RESULT_NONE = "*"
+# plies without capture or pawn move and number of times a position is seen that draw a game
+FIFTY_MOVE_PLIES = 100
+REPETITIONS = 3
+KING_CODE = PIECE_CODES[("white", "K")]
+# pieces that can't mate alone next to the two kings
+MINOR_CODES = (PIECE_CODES[("white", "N")], PIECE_CODES[("white", "B")])
+
+# picks the move a game plays from its legal moves
+Policy = Callable[[Game, list[int], random.Random], int]
+
+
+def random_policy(game: Game, moves: list[int], rng: random.Random) -> int:
+    return rng.choice(moves)
+
+
+def has_insufficient_material(boards: np.typing.NDArray) -> np.typing.NDArray:
+    """
+    :param boards: int8 boards (see PIECE_CODES) of shape (size, size) or (n, size, size)
+    :returns: True for every board where only the kings and at most one knight or bishop are left
+    """
+    pieces = np.abs(boards)
+    few = np.count_nonzero(pieces, axis=(-2, -1)) <= 3
+    harmless = np.isin(pieces, (0, KING_CODE) + MINOR_CODES).all(axis=(-2, -1))
+    return few & harmless
+
+
+def get_king_danger(
+    boards: np.typing.NDArray, white_to_move: np.typing.NDArray
+) -> tuple[np.typing.NDArray, np.typing.NDArray]:
+    """
+    attacks on the king of the side to move for a stack of boards in one call
+
+    :param boards: int8 boards (see PIECE_CODES) of shape (n, size, size)
+    :param white_to_move: True for every board where white moves next
+    :returns: True for every board where that king is in check, and a bool array of shape
+        (n, size, size) with the squares the enemy attacks once that king is taken off the board,
+        so the king can't step back along the ray of a slider
+    """
+    kings = boards == np.where(white_to_move, KING_CODE, -KING_CODE)[:, None, None]
+    attack_maps = get_attack_maps(np.where(kings, 0, boards))
+    # the counts of white are at index 0, so the side to move picks the other color
+    danger = attack_maps[np.arange(len(boards)), white_to_move.astype(np.intp)] > 0
+    return (kings & danger).any(axis=(-2, -1)), danger
+
+
+def to_bitboard(cells: np.typing.NDArray) -> int:
+    """
+    :param cells: bool array of shape (size, size)
+    :returns: the bitboard of the True cells, squares as in bitboard.pos_to_square
+    """
+    return int.from_bytes(
+        np.packbits(cells.ravel(), bitorder="little").tobytes(), "little"
+    )
+
+
+class GameBatch:
+    """
+    N independent games advanced in lockstep, the int8 boards of all games are views into one
+    stacked (N, size, size) array, check, the squares the kings can't step on and the material
+    draw are found for all games at once on that array, Game then generates the legal moves of
+    every game with those squares instead of trying each king move on the board, once per position
+    for the terminal state and the next step
+    """
+
+    def __init__(self, games: Sequence[Game]):
+        """
+        :param games: games of the same board size, their int8 boards become views into the batch array
+        """
+        if not games:
+            raise ValueError("A batch needs at least one game")
+        game_size = games[0].game_size
+        if any(game.game_size != game_size for game in games):
+            raise ValueError("All games of a batch need the same board size")
+
+        self.games = list(games)
+        self.game_size = game_size
+        self.boards = np.stack([game.board.codes for game in self.games])
+        for index, game in enumerate(self.games):
+            # place_piece and remove_piece write straight into the stacked array
+            game.board.codes = self.boards[index]
+
+        self.white_to_move = np.array(
+            [game.cur_player.color == "white" for game in self.games]
+        )
+        self.done = np.zeros(len(self.games), dtype=bool)
+        self.results = [RESULT_NONE] * len(self.games)
+        # why each game ended: checkmate, stalemate, fifty_moves, repetition, material or max_plies
+        self.ends = ["ongoing"] * len(self.games)
+        self.plies = np.zeros(len(self.games), dtype=np.int32)
+        # legal moves of the current position of every game
+        self.moves: list[list[int]] = [[] for _ in self.games]
+        self.records: list[list] = [[] for _ in self.games]
+        self.history = [Counter([game.board.hash]) for game in self.games]
+        self.update_status(range(len(self.games)))
+
+    @classmethod
+    def new(
+        cls, size: int, fen: str = START_FEN, move_cache_size: int = 0
+    ) -> "GameBatch":
+        """
+        :param size: number of games
+        :param fen: position every game starts from
+        :param move_cache_size: move cache of every game, playouts rarely see a position twice
+        :returns: a batch of games starting from the same position
+        """
+        return cls(
+            [Game.from_fen(fen, move_cache_size=move_cache_size) for _ in range(size)]
+        )
+
+    def __len__(self) -> int:
+        return len(self.games)
+
+    @property
+    def active(self) -> np.typing.NDArray:
+        """
+        :returns: indices of the games that are not over
+        """
+        return np.flatnonzero(~self.done)
+
+    def get_legal_moves(self) -> list[list[int]]:
+        """
+        :returns: the packed legal moves of every game, empty for games that are over
+        """
+        return [[] if done else moves for moves, done in zip(self.moves, self.done)]
+
+    def step(self, moves: Sequence[int | None], keep_records: bool = False):
+        """
+        plays one move in every game that is not over and checks which games ended
+
+        :param moves: a packed legal move per game, None skips the game
+        :param keep_records: keep the MoveRecords so undo can take the moves back
+        """
+        if len(moves) != len(self.games):
+            raise ValueError(f"Expected {len(self.games)} moves, got {len(moves)}")
+        stepped = []
+        for index, (game, move) in enumerate(zip(self.games, moves)):
+            if move is None or self.done[index]:
+                continue
+            record = game.make_move(move)
+            if keep_records:
+                self.records[index].append(record)
+            self.history[index][game.board.hash] += 1
+            stepped.append(index)
+        self.plies[stepped] += 1
+        self.white_to_move[stepped] ^= True
+        self.update_status(stepped)
+
+    def undo(self):
+        """
+        takes back the last move kept by step(keep_records=True) in every game that has one
+        """
+        undone = []
+        for index, game in enumerate(self.games):
+            if self.records[index]:
+                self.history[index][game.board.hash] -= 1
+                game.unmake_move(self.records[index].pop())
+                undone.append(index)
+        self.plies[undone] -= 1
+        self.white_to_move[undone] ^= True
+        self.update_status(undone)
+
+    def update_status(self, indices: Iterable[int]):
+        """
+        finds check, the king danger and the material draw of the games on the stacked boards
+        in one pass, then generates their legal moves and applies mate, stalemate and the draw rules
+
+        :param indices: games whose position changed
+        """
+        indices = np.fromiter(indices, dtype=np.intp)
+        if not len(indices):
+            return
+        boards = self.boards[indices]
+        in_check, danger = get_king_danger(boards, self.white_to_move[indices])
+        material = has_insufficient_material(boards)
+
+        for index, check, king_danger, no_material in zip(
+            indices.tolist(), in_check.tolist(), danger, material.tolist()
+        ):
+            game = self.games[index]
+            moves = game.get_legal_moves(king_danger=to_bitboard(king_danger))
+            self.moves[index] = moves
+            if not moves:
+                end = "checkmate" if check else "stalemate"
+            elif game.halfmove_clock >= FIFTY_MOVE_PLIES:
+                end = "fifty_moves"
+            elif self.history[index][game.board.hash] >= REPETITIONS:
+                end = "repetition"
+            elif no_material:
+                end = "material"
+            else:
+                end = "ongoing"
+
+            self.ends[index] = end
+            self.done[index] = end != "ongoing"
+            if end == "checkmate":
+                self.results[index] = "0-1" if self.white_to_move[index] else "1-0"
+            elif end == "ongoing":
+                self.results[index] = RESULT_NONE
+            else:
+                self.results[index] = "1/2-1/2"
+
+    def step_random(self, rng: random.Random = random):
+        """
+        plays a random legal move in every game that is not over
+        """
+        self.step(
+            [rng.choice(moves) if moves else None for moves in self.get_legal_moves()]
+        )
+
+    def playout(
+        self,
+        max_plies: int = 200,
+        rng: random.Random = random,
+        policy: Policy = random_policy,
+    ) -> list[str]:
+        """
+        plays the moves the policy picks until every game is over or reached max_plies
+
+        :returns: the result of every game, * for games stopped by max_plies
+        """
+        while True:
+            playing = ~self.done & (self.plies < max_plies)
+            if not playing.any():
+                break
+            moves = self.get_legal_moves()
+            self.step(
+                [
+                    policy(game, game_moves, rng) if playing[index] else None
+                    for index, (game, game_moves) in enumerate(zip(self.games, moves))
+                ]
+            )
+        for index in np.flatnonzero(~self.done):
+            self.ends[index] = "max_plies"
+        return list(self.results)
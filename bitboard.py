@@ -0,0 +1,66 @@
+from typing import Iterator, Literal
+
+COLORS: tuple[str, str] = ("white", "black")
+SYMBOLS: tuple[str, ...] = ("T", "N", "B", "Q", "K", "P")
+
+
+def pos_to_square(pos: tuple[int, int], game_size: int) -> int:
+    """
+    :param pos: position tuple (row, colum)
+    :param game_size: side length of the board
+    :returns: index of the square, counted row by row from the top-left corner
+    """
+    return pos[0] * game_size + pos[1]
+
+
+def square_to_pos(square: int, game_size: int) -> tuple[int, int]:
+    """
+    :param square: index of the square
+    :param game_size: side length of the board
+    :returns: position tuple (row, colum) of the square
+    """
+    return divmod(square, game_size)
+
+
+def iter_squares(bitboard: int) -> Iterator[int]:
+    """
+    yields the index of every set bit, lowest first
+    """
+    while bitboard:
+        low_bit = bitboard & -bitboard
+        yield low_bit.bit_length() - 1
+        bitboard ^= low_bit
+
+
+def count_bits(bitboard: int) -> int:
+    return bin(bitboard).count("1")
+
+
+class Bitboards:
+    """
+    one integer per piece type and color with a bit set for every square the pieces stand on,
+    plus occupancy masks for each color and the whole board
+    """
+
+    def __init__(self, game_size: int):
+        self.game_size = game_size
+        self.pieces: dict[tuple[str, str], int] = {
+            (color, sym): 0 for color in COLORS for sym in SYMBOLS
+        }
+        self.occupancy: dict[str, int] = {color: 0 for color in COLORS}
+        self.occupied = 0
+
+    def add(self, color: Literal["white", "black"], sym: str, square: int):
+        bit = 1 << square
+        self.pieces[(color, sym)] |= bit
+        self.occupancy[color] |= bit
+        self.occupied |= bit
+
+    def remove(self, color: Literal["white", "black"], sym: str, square: int):
+        mask = ~(1 << square)
+        self.pieces[(color, sym)] &= mask
+        self.occupancy[color] &= mask
+        self.occupied &= mask
+
+    def get(self, color: Literal["white", "black"], sym: str) -> int:
+        return self.pieces[(color, sym)]
@@ -0,0 +1,432 @@
+import argparse
+import time
+from functools import lru_cache
+from bitboard import COLORS, SYMBOLS, count_bits, iter_squares, square_to_pos
+from game import START_FEN, Game, move_to_notation
+from transposition import EXACT, LOWER, UPPER, TranspositionTable
+from moves import (
+    CAPTURE,
+    EN_PASSANT,
+    PROMOTION,
+    move_flags,
+    move_from,
+    move_promotion,
+    move_to,
+)
+
+# material in centipawns, the king is never captured so it has no value
+PIECE_VALUES: dict[str, int] = {
+    "P": 100,
+    "N": 320,
+    "B": 330,
+    "T": 500,
+    "Q": 900,
+    "K": 0,
+}
+
+MATE_SCORE = 100000
+# scores above this are mates, the distance to the mate is MATE_SCORE - abs(score)
+MATE_BOUND = MATE_SCORE - 1000
+INFINITY = MATE_SCORE + 1
+
+# the clock is only looked at every few nodes
+CHECK_INTERVAL = 256
+
+
+class SearchStopped(Exception):
+    """
+    raised inside the search when the time or node budget is used up
+    """
+
+
+class SearchResult:
+    """
+    result of one iteration of SearchEngine.search
+    """
+
+    def __init__(
+        self,
+        move: int | None,
+        score: int,
+        depth: int,
+        nodes: int,
+        seconds: float,
+        pv: list[int],
+    ):
+        self.move = move
+        self.score = score
+        self.depth = depth
+        self.nodes = nodes
+        self.seconds = seconds
+        self.pv = pv
+
+    @property
+    def nps(self) -> float:
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+    def __repr__(self):
+        return (
+            f"SearchResult(move={self.move!r}, score={self.score!r}, depth={self.depth!r},"
+            f" nodes={self.nodes!r}, seconds={self.seconds:.3f}, pv={self.pv!r})"
+        )
+
+
+@lru_cache(maxsize=None)
+def get_piece_square_tables(game_size: int) -> dict[tuple[str, str], tuple[int, ...]]:
+    """
+    small positional bonus per square, pieces other than the king like the center and
+    pawns get more valuable the further they advance
+    :returns: tables indexed like the bitboard squares for every color and symbol
+    """
+    side = game_size - 1
+    center = side / 2
+    tables = {}
+    for color in COLORS:
+        for sym in SYMBOLS:
+            table = []
+            for square in range(game_size * game_size):
+                row, col = square_to_pos(square, game_size)
+                # 0 in the corners, grows towards the center
+                centrality = int(center - max(abs(row - center), abs(col - center)))
+                advance = side - row if color == "white" else row
+                if sym == "P":
+                    bonus = advance * 5 + centrality * 2
+                elif sym == "K":
+                    # the king stays home behind its pawns
+                    bonus = -advance * 10
+                elif sym == "T":
+                    bonus = centrality * 2
+                else:
+                    bonus = centrality * 8
+                table.append(bonus)
+            tables[(color, sym)] = tuple(table)
+    return tables
+
+
+def evaluate(game: Game) -> int:
+    """
+    material and piece square tables
+    :returns: the score of the position in centipawns as seen by the current player
+    """
+    board = game.board
+    tables = get_piece_square_tables(game.game_size)
+    score = 0
+    for (color, sym), bitboard in board.bitboards.pieces.items():
+        if not bitboard:
+            continue
+        table = tables[(color, sym)]
+        value = PIECE_VALUES[sym] * count_bits(bitboard)
+        value += sum(table[square] for square in iter_squares(bitboard))
+        score += value if color == "white" else -value
+    return score if game.cur_player.color == "white" else -score
+
+
+class SearchEngine:
+    """
+    negamax alpha-beta search with iterative deepening on top of Game,
+    Game.get_legal_moves, make_move and unmake_move are the move source
+    """
+
+    def __init__(self, game: Game, hash_mb: float = 16):
+        """
+        :param game: the game to search in, positions are restored after every move tried
+        :param hash_mb: memory cap of the transposition table in megabytes, 0 disables it
+        """
+        self.game = game
+        self.tt = TranspositionTable(hash_mb) if hash_mb > 0 else None
+        self.nodes = 0
+        self.start_time = 0.0
+        self.time_limit: float | None = None
+        self.node_limit: int | None = None
+        self.pv_move: dict[int, int] = {}
+
+    def search(
+        self,
+        max_depth: int = 64,
+        time_limit: float | None = None,
+        node_limit: int | None = None,
+        on_iteration: callable = None,
+    ) -> SearchResult:
+        """
+        searches one depth more every iteration until max_depth or a budget is reached,
+        an iteration that is cut by the budget is thrown away
+
+        :param max_depth: depth of the last iteration
+        :param time_limit: seconds the search may take
+        :param node_limit: nodes the search may visit
+        :param on_iteration: called with the SearchResult of every finished iteration
+        :returns: the SearchResult of the deepest finished iteration
+        """
+        self.start(time_limit, node_limit)
+
+        moves = self.game.get_legal_moves()
+        if not moves:
+            return SearchResult(None, self.get_terminal_score(0), 0, 0, 0.0, [])
+        # returned if no iteration finishes, the position is only evaluated
+        result = SearchResult(moves[0], evaluate(self.game), 0, 0, 0.0, [])
+
+        for depth in range(1, max_depth + 1):
+            try:
+                score, pv = self.negamax(depth, -INFINITY, INFINITY, 0)
+            except SearchStopped:
+                break
+            result = SearchResult(
+                pv[0] if pv else result.move,
+                score,
+                depth,
+                self.nodes,
+                time.perf_counter() - self.start_time,
+                pv,
+            )
+            # the principal variation is tried first in the next iteration
+            self.pv_move = dict(enumerate(pv))
+            if on_iteration is not None:
+                on_iteration(result)
+            # a forced mate can't get any better by searching deeper
+            if abs(score) >= MATE_BOUND:
+                break
+
+        result.nodes = self.nodes
+        result.seconds = time.perf_counter() - self.start_time
+        return result
+
+    def start(self, time_limit: float | None = None, node_limit: int | None = None):
+        """
+        resets the node counter and the clock of a new search
+        """
+        self.nodes = 0
+        self.start_time = time.perf_counter()
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.pv_move = {}
+
+    def count_node(self):
+        """
+        counts a visited node and stops the search once a budget is used up
+        """
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchStopped
+        self.nodes += 1
+        if (
+            self.time_limit is not None
+            and self.nodes % CHECK_INTERVAL == 0
+            and time.perf_counter() - self.start_time >= self.time_limit
+        ):
+            raise SearchStopped
+
+    def in_check(self) -> bool:
+        color = self.game.cur_player.color
+        check_info = self.game.board.get_check_info(color)
+        return check_info is None or bool(check_info.checkers)
+
+    def get_terminal_score(self, ply: int) -> int:
+        """
+        :returns: the score of a position without legal moves, mates closer to the root score higher
+        """
+        if self.in_check():
+            return -MATE_SCORE + ply
+        return 0
+
+    def order_moves(self, moves: list[int], ply: int, hash_move: int = 0) -> list[int]:
+        """
+        the move of the last principal variation first, then the best move stored in the
+        transposition table, then captures of the most valuable piece with the least
+        valuable attacker, then promotions
+        """
+        board = self.game.board
+        game_size = self.game.game_size
+        pv_move = self.pv_move.get(ply)
+
+        def move_score(move: int) -> int:
+            if move == pv_move:
+                return 1000000
+            if move == hash_move:
+                return 900000
+            flags = move_flags(move)
+            score = 0
+            if flags & CAPTURE:
+                target = board.board[square_to_pos(move_to(move), game_size)]
+                attacker = board.board[square_to_pos(move_from(move), game_size)]
+                score += 10 * PIECE_VALUES[target.sym] - PIECE_VALUES[attacker.sym]
+            elif flags & EN_PASSANT:
+                score += 10 * PIECE_VALUES["P"] - PIECE_VALUES["P"]
+            if flags & PROMOTION:
+                score += PIECE_VALUES[move_promotion(move)]
+            return score
+
+        return sorted(moves, key=move_score, reverse=True)
+
+    def negamax(
+        self, depth: int, alpha: int, beta: int, ply: int
+    ) -> tuple[int, list[int]]:
+        """
+        :param depth: remaining depth, captures are searched on by quiescence at depth 0
+        :param ply: distance to the root
+        :returns: the score for the current player and the principal variation
+        """
+        if depth == 0:
+            return self.quiescence(alpha, beta, ply), []
+
+        self.count_node()
+
+        game = self.game
+        key = game.board.hash
+        alpha_start = alpha
+        hash_move = 0
+        entry = self.tt.probe(key) if self.tt is not None else None
+        if entry is not None:
+            entry_depth, bound, score, hash_move = entry
+            # the root always searches, so a principal variation is found
+            if ply > 0 and entry_depth >= depth:
+                score = score_from_table(score, ply)
+                if (
+                    bound == EXACT
+                    or (bound == LOWER and score >= beta)
+                    or (bound == UPPER and score <= alpha)
+                ):
+                    return score, [hash_move] if hash_move else []
+
+        moves = game.get_legal_moves()
+        if not moves:
+            return self.get_terminal_score(ply), []
+
+        best_pv = []
+        for move in self.order_moves(moves, ply, hash_move):
+            record = game.make_move(move)
+            try:
+                score, child_pv = self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                game.unmake_move(record)
+            score = -score
+            if score > alpha:
+                alpha = score
+                best_pv = [move] + child_pv
+                if alpha >= beta:
+                    break
+
+        if self.tt is not None:
+            if alpha >= beta:
+                bound = LOWER
+            elif alpha > alpha_start:
+                bound = EXACT
+            else:
+                bound = UPPER
+            best_move = best_pv[0] if best_pv else 0
+            self.tt.store(key, depth, bound, score_to_table(alpha, ply), best_move)
+        return alpha, best_pv
+
+    def quiescence(self, alpha: int, beta: int, ply: int) -> int:
+        """
+        only searches captures and promotions until the position is quiet,
+        so the evaluation is not taken in the middle of an exchange
+        """
+        self.count_node()
+
+        game = self.game
+        # standing pat is checked before the moves are generated, a mate in a
+        # position that is already good enough is left to the main search
+        stand_pat = evaluate(game)
+        if stand_pat >= beta:
+            return stand_pat
+
+        moves = game.get_legal_moves()
+        if not moves:
+            return self.get_terminal_score(ply)
+        alpha = max(alpha, stand_pat)
+
+        tactical = [
+            move
+            for move in moves
+            if move_flags(move) & (CAPTURE | EN_PASSANT) or move_promotion(move) == "Q"
+        ]
+        for move in self.order_moves(tactical, -1):
+            record = game.make_move(move)
+            try:
+                score = -self.quiescence(-beta, -alpha, ply + 1)
+            finally:
+                game.unmake_move(record)
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+        return alpha
+
+
+def score_to_table(score: int, ply: int) -> int:
+    """
+    mate scores are stored as distance to the mate from the stored position, not from the root
+    """
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_table(score: int, ply: int) -> int:
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+def format_score(score: int) -> str:
+    """
+    :returns: the score in pawns or the moves until mate (e.g. +0.35 or #3)
+    """
+    if abs(score) >= MATE_BOUND:
+        moves_to_mate = (MATE_SCORE - abs(score) + 1) // 2
+        return f"#{moves_to_mate}" if score > 0 else f"#-{moves_to_mate}"
+    return f"{score / 100:+.2f}"
+
+
+def print_iteration(result: SearchResult, game_size: int = 8):
+    pv = " ".join(move_to_notation(move, game_size) for move in result.pv)
+    print(
+        f"depth {result.depth} score {format_score(result.score)} nodes {result.nodes}"
+        f" nps {result.nps:.0f} time {result.seconds:.2f}s pv {pv}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="search a position and print every iteration"
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=None,
+        help="maximum depth, 4 if neither a time nor a node budget is given",
+    )
+    parser.add_argument("--time", type=float, default=None, help="seconds per move")
+    parser.add_argument("--nodes", type=int, default=None, help="nodes per move")
+    parser.add_argument("--fen", default=START_FEN, help="position to search")
+    parser.add_argument(
+        "--hash",
+        type=float,
+        default=16,
+        help="megabytes of the transposition table, 0 disables it",
+    )
+    args = parser.parse_args()
+
+    game = Game.from_fen(args.fen)
+    engine = SearchEngine(game, hash_mb=args.hash)
+    result = engine.search(
+        max_depth=args.depth or (64 if args.time or args.nodes else 4),
+        time_limit=args.time,
+        node_limit=args.nodes,
+        on_iteration=lambda r: print_iteration(r, game.game_size),
+    )
+    if engine.tt is not None:
+        stats = engine.tt.stats()
+        print(
+            f"hash {stats['bytes'] / 1024 / 1024:.1f}MB used {stats['used']}/{stats['entries']}"
+            f" hit rate {stats['hit_rate']:.0%}"
+        )
+    if result.move is not None:
+        print(f"bestmove {move_to_notation(result.move, game.game_size)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,51 @@
+import re
 import numpy as np
 from pieces import PieceManager
-from typing import Literal
-from copy import deepcopy
+from bitboard import (
+    Bitboards,
+    COLORS,
+    SYMBOLS,
+    iter_squares,
+    pos_to_square,
+    square_to_pos,
+)
+from attacks import get_attack_tables
+from attack_maps import PIECE_CODES, get_attack_maps
+from zobrist import get_zobrist_keys
+from move_cache import MoveCache
+from moves import (
+    QUIET,
+    CAPTURE,
+    EN_PASSANT,
+    DOUBLE_PUSH,
+    PROMOTION,
+    CASTLING,
+    encode_move,
+    move_from,
+    move_to,
+    move_flags,
+    move_promotion,
+    move_to_positions,
+    positions_to_move,
+)
+from typing import Iterator, Literal
+
+# order in which promotions are generated, strongest first
+PROMOTION_ORDER: tuple[str, ...] = ("Q", "T", "B", "N")
+
+# fen letters of the pieces, the rook is called tower (T) in this game
+FEN_SYMBOLS: dict[str, str] = {
+    "p": "P",
+    "n": "N",
+    "b": "B",
+    "r": "T",
+    "q": "Q",
+    "k": "K",
+}
+FEN_LETTERS: dict[str, str] = {sym: letter for letter, sym in FEN_SYMBOLS.items()}
+# castling letters by the bit of GameBoard.get_castling_rights
+FEN_CASTLING: tuple[str, ...] = ("Q", "K", "q", "k")
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
 
 
 def get_placement(
@@ -23,6 +67,35 @@ def get_placement(
     return pos1, pos2, pos3, pos4
 
 
+def pos_to_notation(pos: tuple[int, int], game_size: int = 8) -> str:
+    """
+    :param pos: position tuple (row, colum), row 0 is the side of black
+    :returns: the position in algebraic notation (e.g. (6, 4) is e2)
+    """
+    return f"{chr(ord('a') + pos[1])}{game_size - pos[0]}"
+
+
+def notation_to_pos(notation: str, game_size: int = 8) -> tuple[int, int]:
+    """
+    :param notation: position in algebraic notation (e.g. e2)
+    :returns: position tuple (row, colum)
+    """
+    return game_size - int(notation[1:]), ord(notation[0]) - ord("a")
+
+
+def move_to_notation(move: int, game_size: int = 8) -> str:
+    """
+    :param move: packed move (see moves.py)
+    :returns: the move as from and to square in algebraic notation (e.g. e2e4 or e7e8Q)
+    """
+    pos1, pos2 = move_to_positions(move, game_size)
+    return (
+        pos_to_notation(pos1, game_size)
+        + pos_to_notation(pos2, game_size)
+        + move_promotion(move)
+    )
+
+
 def pretty_print_array(array: np.typing.NDArray):
     for row in array:
         str_row = ""
@@ -61,26 +134,213 @@ def get_pos_inbetween(
 
 
 class GameBoard:
-    def __init__(self, game_size: int, pm: PieceManager):
+    def __init__(self, game_size: int, pm: PieceManager, empty: bool = False):
+        """
+        :param game_size: side length of the board
+        :param pm: PieceManager that creates the pieces
+        :param empty: leave the board empty instead of setting up the start position
+        """
         self.game_size = game_size
         self.pm = pm
         self.board = np.empty(shape=(self.game_size, self.game_size), dtype=np.object_)
+        # the same board as int8 piece codes (see attack_maps.PIECE_CODES) for vectorized analysis
+        self.codes = np.zeros(shape=(self.game_size, self.game_size), dtype=np.int8)
+        self.bitboards = Bitboards(self.game_size)
+        self.tables = get_attack_tables(self.game_size)
         self.side = self.board.shape[0] - 1
-        self.setup_board()
 
-        self.black_kill_array = np.zeros(
-            shape=(self.game_size, self.game_size), dtype=int
-        )
-        self.white_kill_array = np.zeros(
-            shape=(self.game_size, self.game_size), dtype=int
-        )
+        # zobrist hash of the position, kept up to date on every change of the board
+        self.zobrist = get_zobrist_keys(self.game_size)
+        self.hash = 0
+        self.side_to_move: Literal["white", "black"] = "white"
+        self.check_infos: dict[str, CheckInfo] = {}
+
+        # squares each piece attacks and squares its arrays depend on, as bitboards
+        self.attack_sets: dict[object, int] = {}
+        self.reach_sets: dict[object, int] = {}
+        # number of pieces of a color attacking each square
+        self.attack_counts: dict[str, list[int]] = {
+            color: [0] * (self.game_size * self.game_size) for color in COLORS
+        }
+        # set when pieces were placed without their arrays, see update_outdated_arrays
+        self.arrays_outdated = False
+
+        if not empty:
+            self.setup_board()
 
     def setup_board(self):
         self.setup_high_pieces()
         self.setup_king_queen()
         self.setup_pawns()
+        # place_piece only hashes the pieces
+        self.hash ^= self.get_castling_hash(self.get_castling_rights())
         self.update_piece_arrays()
 
+    def place_piece(self, piece, pos: tuple[int, int]):
+        """
+        puts the piece on the board and keeps the bitboards in sync
+        :param piece: a Piece object from PieceManager Class (e.g. Tower)
+        :param pos: target position, has to be empty
+        """
+        square = pos_to_square(pos, self.game_size)
+        piece.move_to(pos)
+        self.board[pos] = piece
+        self.codes[pos] = PIECE_CODES[(piece.color, piece.sym)]
+        self.bitboards.add(piece.color, piece.sym, square)
+        self.hash ^= self.zobrist.pieces[(piece.color, piece.sym)][square]
+
+    def remove_piece(self, pos: tuple[int, int]):
+        """
+        :param pos: position of the piece to take off the board
+        :returns: the removed piece or None if the cell was empty
+        """
+        piece = self.board[pos]
+        if piece is not None:
+            square = pos_to_square(pos, self.game_size)
+            self.board[pos] = None
+            self.codes[pos] = 0
+            self.bitboards.remove(piece.color, piece.sym, square)
+            self.hash ^= self.zobrist.pieces[(piece.color, piece.sym)][square]
+        return piece
+
+    def switch_side(self):
+        """
+        hands the move to the other color
+        """
+        self.side_to_move = "black" if self.side_to_move == "white" else "white"
+        self.hash ^= self.zobrist.black_to_move
+
+    def compute_hash(self) -> int:
+        """
+        :returns: the zobrist hash of the position computed from scratch
+        """
+        position_hash = 0
+        for (color, sym), bitboard in self.bitboards.pieces.items():
+            keys = self.zobrist.pieces[(color, sym)]
+            for square in iter_squares(bitboard):
+                position_hash ^= keys[square]
+        if self.side_to_move == "black":
+            position_hash ^= self.zobrist.black_to_move
+        for piece in self.iter_pieces():
+            if piece.en_passant_possible:
+                position_hash ^= self.zobrist.en_passant_files[piece.cur_pos[1]]
+        return position_hash ^ self.get_castling_hash(self.get_castling_rights())
+
+    def get_castling_rights(self) -> int:
+        """
+        a color keeps the right to castle to a side as long as its king and the rook in
+        the corner of that side haven't moved
+
+        :returns: bit 2 * color index + side is set for every right, side 0 is the rook
+            in column 0 and side 1 the rook in the last column
+        """
+        rights = 0
+        for index, color in enumerate(COLORS):
+            row = self.side if color == "white" else 0
+            for square in iter_squares(self.bitboards.get(color, "K")):
+                king = self.board[square_to_pos(square, self.game_size)]
+                if king.moved or king.cur_pos[0] != row:
+                    continue
+                for side, col in enumerate((0, self.side)):
+                    rook = self.board[row, col]
+                    if (
+                        type(rook) is PieceManager.Rook
+                        and rook.color == color
+                        and not rook.moved
+                    ):
+                        rights |= 1 << (2 * index + side)
+        return rights
+
+    def get_castling_hash(self, rights: int) -> int:
+        """
+        :param rights: castling rights as returned by get_castling_rights
+        :returns: the xor of the zobrist keys of the rights
+        """
+        castling_hash = 0
+        for bit in iter_squares(rights):
+            castling_hash ^= self.zobrist.castling[bit]
+        return castling_hash
+
+    def get_castling_moves(self, king) -> list[tuple[int, int]]:
+        """
+        the king moves two squares towards an unmoved rook of its row, it may not be in check,
+        pass an attacked square or land on one and every square up to the rook has to be empty
+
+        :param king: a King of PieceManager
+        :returns: the target positions of the king
+        """
+        row, col = king.cur_pos
+        if king.moved or row != (self.side if king.color == "white" else 0):
+            return []
+        enemy = "black" if king.color == "white" else "white"
+        if self.is_attacked(king.cur_pos, enemy):
+            return []
+
+        targets = []
+        for rook_col, step in ((0, -1), (self.side, 1)):
+            if abs(rook_col - col) < 3:
+                continue
+            rook = self.board[row, rook_col]
+            if (
+                type(rook) is not PieceManager.Rook
+                or rook.color != king.color
+                or rook.moved
+            ):
+                continue
+            between = range(min(col, rook_col) + 1, max(col, rook_col))
+            if any(self.board[row, between_col] is not None for between_col in between):
+                continue
+            if self.is_attacked((row, col + step), enemy) or self.is_attacked(
+                (row, col + 2 * step), enemy
+            ):
+                continue
+            targets.append((row, col + 2 * step))
+        return targets
+
+    def get_castling_rook_move(
+        self, pos1: tuple[int, int], pos2: tuple[int, int]
+    ) -> tuple[tuple[int, int], tuple[int, int]]:
+        """
+        :param pos1: position of the castling king
+        :param pos2: target position of the king
+        :returns: the position of the rook and the square the king passes that the rook moves to
+        """
+        rook_col = 0 if pos2[1] < pos1[1] else self.side
+        return (pos1[0], rook_col), (pos1[0], (pos1[1] + pos2[1]) // 2)
+
+    def iter_pieces(
+        self, color: Literal["white", "black", "both"] = "both"
+    ) -> Iterator:
+        """
+        :param color: only yield pieces of this color
+        :returns: iterator over the pieces on the board, row by row
+        """
+        if color == "both":
+            occupancy = self.bitboards.occupied
+        else:
+            occupancy = self.bitboards.occupancy[color]
+        for square in iter_squares(occupancy):
+            yield self.board[square_to_pos(square, self.game_size)]
+
+    def get_piece_rays(self, piece, strike: bool = False) -> list[tuple[int, ...]]:
+        """
+        :param piece: a Piece object from PieceManager Class (e.g. Tower)
+        :param strike: True for the rays the piece strikes along, False for the rays it moves along
+        :returns: rays of squares ordered by distance to the piece, a ray ends at its first blocker
+        """
+        square = pos_to_square(piece.cur_pos, self.game_size)
+        piece_type = type(piece)
+        if piece_type is PieceManager.Knight:
+            return self.tables.knight_rays[square]
+        if piece_type is PieceManager.King:
+            return self.tables.king_rays[square]
+        if piece_type is PieceManager.Pawn:
+            if strike:
+                return self.tables.pawn_strike_rays[piece.color][square]
+            pushes = self.tables.pawn_pushes[piece.color][square]
+            return [pushes[:1] if piece.moved else pushes]
+        return [self.tables.rays[direction][square] for direction in piece.directions]
+
     def get_numbercode_array(self, piece) -> np.typing.NDArray:
         """
         Numbercode in returned array:\n
@@ -108,22 +368,16 @@ class GameBoard:
         :returns: an array with 1s were the piece can move
         """
         if array is None:
-            array = np.zeros(shape=(self.game_size, self.game_size), dtype=int)
+            array = np.zeros(shape=(self.game_size, self.game_size), dtype=np.int8)
 
         move_array = array.copy()
-        moves = self.cut_list_to_board(piece.possible_pos)
-        for move_pos in moves:
-            # loop through possible moves and get the cell at the pos
-            cell = self.board[move_pos]
-            if cell is None:
-                free = True
-                if not piece.can_jump:
-                    # check if a piece is in the way
-                    for pos in get_pos_inbetween(piece.cur_pos, move_pos):
-                        if self.board[pos] is not None:
-                            free = False
-                if free:
-                    move_array[move_pos] = 1
+        occupied = self.bitboards.occupied
+        for ray in self.get_piece_rays(piece):
+            # walk the ray until a piece is in the way
+            for square in ray:
+                if occupied >> square & 1:
+                    break
+                move_array[divmod(square, self.game_size)] = 1
 
         return move_array
 
@@ -136,23 +390,19 @@ class GameBoard:
         :returns: an array with 2s were the piece can strike an enemy
         """
         if array is None:
-            array = np.zeros(shape=(self.game_size, self.game_size), dtype=int)
+            array = np.zeros(shape=(self.game_size, self.game_size), dtype=np.int8)
         strike_array = array.copy()
-        strikes = self.cut_list_to_board(piece.possible_strikes)
-        for strike_pos in strikes:
-            cell = self.board[strike_pos]
-            if cell is None:
-                pass
-            # check if the piece in the cell is an enemy
-            elif cell.color != piece.color:
-                free = True
-                if not piece.can_jump:
-                    # check if a piece is in the way
-                    for pos in get_pos_inbetween(piece.cur_pos, strike_pos):
-                        if self.board[pos] is not None:
-                            free = False
-                if free:
-                    strike_array[strike_pos] = 2
+        occupied = self.bitboards.occupied
+        enemies = self.bitboards.occupancy[
+            "black" if piece.color == "white" else "white"
+        ]
+        for ray in self.get_piece_rays(piece, strike=True):
+            # walk the ray until the first piece and check if it is an enemy
+            for square in ray:
+                if occupied >> square & 1:
+                    if enemies >> square & 1:
+                        strike_array[divmod(square, self.game_size)] = 2
+                    break
 
         return strike_array
 
@@ -165,7 +415,7 @@ class GameBoard:
         :returns: an array with 3 and 4s were the piece can perform an en_passant
         """
         if array is None:
-            array = np.zeros(shape=(self.game_size, self.game_size), dtype=int)
+            array = np.zeros(shape=(self.game_size, self.game_size), dtype=np.int8)
         passant_array = array.copy()
         if type(piece) is PieceManager.Pawn:
             passant_dict = self.cut_dict_to_board(piece.en_passant())
@@ -187,80 +437,276 @@ class GameBoard:
         for piece, place in self.pm.high_pieces.items():
             positions = get_placement(place=place, shape=self.board.shape)
             for pos in positions[0:2]:
-                p = piece(color="black")
-                p.move_to(pos)
-                self.board[pos] = p
+                self.place_piece(piece(color="black"), pos)
             for pos in positions[-2:]:
-                p = piece(color="white")
-                p.move_to(pos)
-                self.board[pos] = p
+                self.place_piece(piece(color="white"), pos)
 
     def setup_king_queen(self):
         """
         populates the gameboard with the kings and queens
         """
-        k = self.pm.King("black")
-        k.move_to((0, self.pm.king_place))
-        self.board[(0, self.pm.king_place)] = k
-
-        q = self.pm.Queen("black")
-        q.move_to((0, self.pm.queen_place))
-        self.board[(0, self.pm.queen_place)] = q
-
-        k = self.pm.King("white")
-        k.move_to((self.side, self.pm.king_place))
-        self.board[(self.side, self.pm.king_place)] = k
+        self.place_piece(self.pm.King("black"), (0, self.pm.king_place))
+        self.place_piece(self.pm.Queen("black"), (0, self.pm.queen_place))
 
-        q = self.pm.Queen("white")
-        q.move_to((self.side, self.pm.queen_place))
-        self.board[(self.side, self.pm.queen_place)] = q
+        self.place_piece(self.pm.King("white"), (self.side, self.pm.king_place))
+        self.place_piece(self.pm.Queen("white"), (self.side, self.pm.queen_place))
 
     def setup_pawns(self):
         """
         populates the gameboard with the pawns
         """
         for x in range(0, self.side + 1):
-            p = self.pm.Pawn("black")
-            p.move_to((1, x))
-            self.board[1, x] = p
+            self.place_piece(self.pm.Pawn("black"), (1, x))
 
         for x in range(0, self.side + 1):
-            p = self.pm.Pawn("white")
-            p.move_to((self.side - 1, x))
-            self.board[self.side - 1, x] = p
+            self.place_piece(self.pm.Pawn("white"), (self.side - 1, x))
+
+    def get_attack_set(self, piece) -> int:
+        """
+        :param piece: a Piece object from PieceManager Class (e.g. Tower)
+        :returns: bitboard of the squares the piece attacks, including the first blocker of every ray
+        """
+        occupied = self.bitboards.occupied
+        attack_set = 0
+        for ray in self.get_piece_rays(piece, strike=True):
+            for square in ray:
+                attack_set |= 1 << square
+                if occupied >> square & 1:
+                    break
+        return attack_set
+
+    def get_reach_set(self, piece, attack_set: int) -> int:
+        """
+        :param piece: a Piece object from PieceManager Class (e.g. Tower)
+        :param attack_set: the attack set of the piece
+        :returns: bitboard of the squares whose content the arrays of the piece depend on
+        """
+        if type(piece) is not PieceManager.Pawn:
+            return attack_set
+
+        occupied = self.bitboards.occupied
+        reach_set = attack_set
+        for ray in self.get_piece_rays(piece):
+            for square in ray:
+                reach_set |= 1 << square
+                if occupied >> square & 1:
+                    break
+        # cells next to the pawn decide about en passant
+        for strike_pos in self.cut_dict_to_board(piece.en_passant()).values():
+            reach_set |= 1 << pos_to_square(strike_pos, self.game_size)
+        return reach_set
+
+    def set_attack_set(self, piece, attack_set: int):
+        """
+        stores the attack set of the piece and updates the attack counts of its color with the difference
+
+        :param piece: a Piece object from PieceManager Class (e.g. Tower)
+        :param attack_set: the new attack set, 0 to take the piece out of the counts
+        """
+        old_attack_set = self.attack_sets.pop(piece, 0)
+        if attack_set:
+            self.attack_sets[piece] = attack_set
+        counts = self.attack_counts[piece.color]
+        gained = attack_set & ~old_attack_set
+        for square in iter_squares(gained):
+            counts[square] += 1
+        for square in iter_squares(old_attack_set & ~attack_set):
+            counts[square] -= 1
+
+    def update_piece(self, piece):
+        """
+        recomputes the attack set and reach set of a piece on the board, the strike_array and
+        numbercode_array are only marked outdated and built by update_outdated_piece_arrays
+        once they are read
+        """
+        attack_set = self.get_attack_set(piece)
+        self.set_attack_set(piece, attack_set)
+        self.reach_sets[piece] = self.get_reach_set(piece, attack_set)
+        piece.arrays_outdated = True
+
+    def update_outdated_piece_arrays(self, piece):
+        """
+        builds the strike_array and numbercode_array of a piece on the board if they are outdated,
+        has to be called before they are read
+        """
+        if self.arrays_outdated:
+            self.update_outdated_arrays()
+        if piece.arrays_outdated:
+            piece.strike_array = self.get_strike_array(piece)
+            piece.numbercode_array = self.get_numbercode_array(piece)
+            piece.arrays_outdated = False
+
+    def drop_piece(self, piece):
+        """
+        forgets everything stored about a piece that left the board
+        """
+        self.set_attack_set(piece, 0)
+        self.reach_sets.pop(piece, None)
+
+    def get_affected_pieces(self, squares: int) -> list:
+        """
+        :param squares: bitboard of the squares that changed
+        :returns: pieces whose arrays depend on one of the squares
+        """
+        return [piece for piece, reach in self.reach_sets.items() if reach & squares]
 
     def update_piece_arrays(self):
         """
-        updates the strike_array and the numbercode_array attribute of the pieces on the board
+        updates the attack set and reach set of every piece on the board and marks its arrays outdated
         """
-        for row in self.board:
-            for cell in row:
-                if cell is not None:
-                    cell.strike_array = self.get_strike_array(cell)
-                    cell.numbercode_array = self.get_numbercode_array(cell)
+        for piece in self.iter_pieces():
+            self.update_piece(piece)
+
+    def update_outdated_arrays(self):
+        """
+        positions loaded with Game.from_fen or Game.deserialize only place the pieces,
+        their arrays, attack sets and reach sets are built here the first time they are needed
+        """
+        if self.arrays_outdated:
+            self.arrays_outdated = False
+            self.update_piece_arrays()
 
     def update_color_kill_arrays(self):
         """
-        updates the array with all possible strike positions for white and black
+        recounts the attacked squares of white and black from scratch with the vectorized attack maps
         """
-        self.black_kill_array = np.zeros(
-            shape=(self.game_size, self.game_size), dtype=int
-        )
-        self.white_kill_array = np.zeros(
-            shape=(self.game_size, self.game_size), dtype=int
+        self.update_outdated_arrays()
+        attack_maps = get_attack_maps(self.codes)
+        for index, color in enumerate(COLORS):
+            self.attack_counts[color] = attack_maps[index].ravel().tolist()
+
+    def is_attacked(
+        self, pos: tuple[int, int], color: Literal["white", "black"]
+    ) -> bool:
+        """
+        :param pos: position to test
+        :param color: color of the attacking pieces
+        :returns: True if a piece of the color attacks the position
+        """
+        if self.arrays_outdated:
+            self.update_outdated_arrays()
+        return self.attack_counts[color][pos_to_square(pos, self.game_size)] > 0
+
+    def get_check_info(self, color: Literal["white", "black"]) -> "CheckInfo | None":
+        """
+        finds the pieces giving check to the king of the color and the pieces pinned to it,
+        computed once per position and color
+
+        :param color: color of the king
+        :returns: a CheckInfo or None if a king is missing
+        """
+        check_info = self.check_infos.get(color)
+        if check_info is not None and check_info.hash == self.hash:
+            return check_info
+
+        enemy = "black" if color == "white" else "white"
+        king = self.bitboards.get(color, "K")
+        if not king or not self.bitboards.get(enemy, "K"):
+            return None
+
+        king_square = king.bit_length() - 1
+        tables = self.tables
+        bitboards = self.bitboards
+        occupied = bitboards.occupied
+        own = bitboards.occupancy[color]
+        queens = bitboards.get(enemy, "Q")
+        sliders = {
+            direction: bitboards.get(enemy, "T") | queens
+            for direction in PieceManager.Rook.directions
+        }
+        sliders.update(
+            {
+                direction: bitboards.get(enemy, "B") | queens
+                for direction in PieceManager.Bishop.directions
+            }
         )
 
-        for row in self.board:
-            for cell in row:
-                if cell is not None:
-                    strike_array = self.get_strike_array(cell)
-                    passant_array = self.get_en_passant_array(cell)
-                    if cell.color == "white":
-                        self.white_kill_array[strike_array == 2] = 2
-                        self.white_kill_array[passant_array == 4] = 2
-                    elif cell.color == "black":
-                        self.black_kill_array[strike_array == 2] = 2
-                        self.black_kill_array[passant_array == 4] = 2
+        checkers = tables.knight_attacks[king_square] & bitboards.get(enemy, "N")
+        checkers |= tables.pawn_attacks[color][king_square] & bitboards.get(enemy, "P")
+        check_mask = checkers
+        pin_rays = {}
+
+        for direction, rays in tables.rays.items():
+            ray = rays[king_square]
+            ray_mask = 0
+            pinned_square = None
+            for square in ray:
+                ray_mask |= 1 << square
+                if not occupied >> square & 1:
+                    continue
+                if own >> square & 1:
+                    if pinned_square is not None:
+                        break
+                    pinned_square = square
+                    continue
+                if sliders[direction] >> square & 1:
+                    if pinned_square is None:
+                        checkers |= 1 << square
+                        check_mask |= ray_mask
+                    else:
+                        pin_rays[pinned_square] = ray_mask
+                break
+
+        if checkers & (checkers - 1):
+            # double check, only the king can move
+            check_mask = 0
+        elif not checkers:
+            check_mask = -1
+
+        check_info = CheckInfo(self.hash, checkers, check_mask, pin_rays)
+        self.check_infos[color] = check_info
+        return check_info
+
+    def get_kill_array(self, color: Literal["white", "black"]) -> np.typing.NDArray:
+        """
+        :param color: color of the striking pieces
+        :returns: an array with 2s on every enemy the color can strike, en passant included
+        """
+        self.update_outdated_arrays()
+        kill_array = np.zeros(shape=(self.game_size, self.game_size), dtype=np.int8)
+        enemy = "black" if color == "white" else "white"
+        counts = self.attack_counts[color]
+        for square in iter_squares(self.bitboards.occupancy[enemy]):
+            if counts[square]:
+                kill_array[square_to_pos(square, self.game_size)] = 2
+        for square in iter_squares(self.bitboards.get(color, "P")):
+            pawn = self.board[square_to_pos(square, self.game_size)]
+            kill_array[self.get_en_passant_array(pawn) == 4] = 2
+        return kill_array
+
+    @property
+    def white_kill_array(self) -> np.typing.NDArray:
+        return self.get_kill_array("white")
+
+    @property
+    def black_kill_array(self) -> np.typing.NDArray:
+        return self.get_kill_array("black")
+
+    def clear_en_passant(
+        self, color: Literal["white", "black"], record: "MoveRecord" = None
+    ):
+        """
+        ends the en passant chance of the pawns of the color and updates the pieces next to them
+
+        :param color: color of the pawns
+        :param record: MoveRecord of the last move, unmake_move then restores the en passant chances too
+        """
+        self.update_outdated_arrays()
+        changed = 0
+        for square in iter_squares(self.bitboards.get(color, "P")):
+            pawn = self.board[square_to_pos(square, self.game_size)]
+            if pawn.en_passant_possible:
+                pawn.en_passant_possible = False
+                self.hash ^= self.zobrist.en_passant_files[pawn.cur_pos[1]]
+                changed |= 1 << square
+                if record is not None:
+                    record.cleared_pawns.append(pawn)
+        if changed:
+            affected = self.get_affected_pieces(changed)
+            if record is not None:
+                record.save_pieces(self, affected)
+            for piece in affected:
+                self.update_piece(piece)
 
     def get_kings_pos(self) -> tuple[tuple[int, int], tuple[int, int]]:
         """
@@ -268,13 +714,10 @@ class GameBoard:
         """
         white_king_pos, black_king_pos = "killed", "killed"
 
-        for row in self.board:
-            for cell in row:
-                if type(cell) is PieceManager.King:
-                    if cell.color == "white":
-                        white_king_pos = cell.cur_pos
-                    elif cell.color == "black":
-                        black_king_pos = cell.cur_pos
+        for square in iter_squares(self.bitboards.get("white", "K")):
+            white_king_pos = square_to_pos(square, self.game_size)
+        for square in iter_squares(self.bitboards.get("black", "K")):
+            black_king_pos = square_to_pos(square, self.game_size)
 
         return white_king_pos, black_king_pos
 
@@ -292,59 +735,180 @@ class GameBoard:
             print(str_row)
         print()
 
-    def move_piece(self, pos1: tuple[int, int], pos2: tuple[int, int]):
+    def make_move(self, move: int) -> "MoveRecord":
         """
-        :param pos1: position of the piece that should be moved
-        :param pos2: target position
+        moves a piece and records everything needed to take the move back with unmake_move,
+        only the pieces whose arrays depend on the changed squares are updated
 
-        :returns: piece that got killed or None
+        :param move: packed move (see moves.py)
+
+        :returns: a MoveRecord of the move
         """
+        self.update_outdated_arrays()
+        pos1, pos2 = move_to_positions(move, self.game_size)
+        flags = move_flags(move)
         piece = self.board[pos1]
-        if type(piece) is PieceManager.Pawn:
-            if not piece.moved:
-                piece.possible_pos.pop(-1)
-                piece.moved = True
-                if abs(pos1[0] - pos2[0]) == 2:
-                    piece.en_passant_possible = True
+        record = MoveRecord(piece, move, pos1, pos2, self.hash)
+
+        if flags & DOUBLE_PUSH:
+            piece.en_passant_possible = True
+            self.hash ^= self.zobrist.en_passant_files[pos2[1]]
 
-        action = piece.numbercode_array[pos2]
+        if flags & CAPTURE:
+            record.target_pos = pos2
+        elif flags & EN_PASSANT:
+            record.target_pos = (pos1[0], pos2[1])
 
-        target_piece = None
+        # only the first move of a king or rook or the capture of a rook can end a castling right
+        castling_rights = None
+        target = self.board[record.target_pos] if record.target_pos else None
+        if (
+            type(piece) in (PieceManager.King, PieceManager.Rook) and not piece.moved
+        ) or (type(target) is PieceManager.Rook and not target.moved):
+            castling_rights = self.get_castling_rights()
+        piece.moved = True
+
+        changed = 1 << move_from(move) | 1 << move_to(move)
+        if record.target_pos is not None:
+            changed |= 1 << pos_to_square(record.target_pos, self.game_size)
+        rook = None
+        if flags & CASTLING:
+            rook_pos1, rook_pos2 = self.get_castling_rook_move(pos1, pos2)
+            rook = self.board[rook_pos1]
+            changed |= 1 << pos_to_square(rook_pos1, self.game_size)
+            changed |= 1 << pos_to_square(rook_pos2, self.game_size)
+
+        affected = self.get_affected_pieces(changed)
+        for moving_piece in (piece, rook):
+            if moving_piece is not None and moving_piece not in affected:
+                affected.append(moving_piece)
+        record.save_pieces(self, affected)
+
+        if record.target_pos is not None:
+            record.target_piece = self.remove_piece(record.target_pos)
+            if record.target_piece.en_passant_possible:
+                self.hash ^= self.zobrist.en_passant_files[record.target_pos[1]]
+            if record.target_piece not in affected:
+                record.save_pieces(self, [record.target_piece])
+            self.drop_piece(record.target_piece)
+
+        self.remove_piece(pos1)
+        self.place_piece(piece, pos2)
+        if rook is not None:
+            self.remove_piece(rook_pos1)
+            self.place_piece(rook, rook_pos2)
+            rook.moved = True
+        for affected_piece in affected:
+            if affected_piece is not record.target_piece:
+                self.update_piece(affected_piece)
+
+        if castling_rights is not None:
+            self.hash ^= self.get_castling_hash(
+                castling_rights ^ self.get_castling_rights()
+            )
+
+        promotion = move_promotion(move)
+        if promotion:
+            record.promoted_piece = self.replace_pawn(piece, promotion)
+
+        return record
+
+    def unmake_move(self, record: "MoveRecord"):
+        """
+        takes back a move made with make_move, moves have to be taken back in reverse order
 
+        :param record: the MoveRecord returned by make_move
+        """
+        piece = record.piece
+        self.remove_piece(record.pos2)
+        self.place_piece(piece, record.pos1)
+        if move_flags(record.move) & CASTLING:
+            rook_pos1, rook_pos2 = self.get_castling_rook_move(record.pos1, record.pos2)
+            rook = self.remove_piece(rook_pos2)
+            self.place_piece(rook, rook_pos1)
+            # castling is only possible with a rook that never moved
+            rook.moved = False
+        if record.target_piece is not None:
+            self.place_piece(record.target_piece, record.target_pos)
+
+        piece.en_passant_possible = record.en_passant_possible
+        piece.moved = record.moved
+        for pawn in record.cleared_pawns:
+            pawn.en_passant_possible = True
+
+        for (
+            saved_piece,
+            strike_array,
+            numbercode_array,
+            arrays_outdated,
+            attack_set,
+            reach_set,
+        ) in reversed(record.saved_pieces):
+            saved_piece.strike_array = strike_array
+            saved_piece.numbercode_array = numbercode_array
+            saved_piece.arrays_outdated = arrays_outdated
+            self.set_attack_set(saved_piece, attack_set)
+            self.reach_sets[saved_piece] = reach_set
+        # after the saved pieces, clearing the en passant chances may have saved the new piece too
+        if record.promoted_piece is not None:
+            self.drop_piece(record.promoted_piece)
+        self.hash = record.hash
+
+    def get_move_flags(self, piece, pos: tuple[int, int]) -> int:
+        """
+        :param piece: a Piece object from PieceManager Class (e.g. Tower)
+        :param pos: target position, has to be a move of the piece's numbercode_array or castling
+        :returns: the flags of the packed move (see moves.py)
+        """
+        self.update_outdated_piece_arrays(piece)
+        action = piece.numbercode_array[pos]
+        flags = QUIET
         if action == 2:
-            target_piece = self.board[pos2]
+            flags = CAPTURE
         elif action == 3:
-            match piece.color:
-                case "black":
-                    pos = (pos2[0] - 1, pos2[1])
-                    target_piece = self.board[pos]
-                case "white":
-                    pos = (pos2[0] + 1, pos2[1])
-                    target_piece = self.board[pos]
-
-            self.board[pos] = None
+            flags = EN_PASSANT
+        if type(piece) is PieceManager.Pawn:
+            if abs(piece.cur_pos[0] - pos[0]) == 2:
+                flags |= DOUBLE_PUSH
+            if pos[0] == 0 or pos[0] == self.side:
+                flags |= PROMOTION
+        elif type(piece) is PieceManager.King and abs(piece.cur_pos[1] - pos[1]) == 2:
+            flags |= CASTLING
+        return flags
+
+    def encode_piece_move(self, pos1: tuple[int, int], pos2: tuple[int, int]) -> int:
+        """
+        :param pos1: position of the piece that should be moved
+        :param pos2: target position
+        :returns: the packed move with its flags, a pawn reaching the end is not promoted
+        """
+        flags = self.get_move_flags(self.board[pos1], pos2)
+        return positions_to_move(pos1, pos2, self.game_size, flags)
 
-        self.board[pos1] = None
-        piece.move_to(pos2)
-        self.board[pos2] = piece
-        self.update_piece_arrays()
-        self.update_color_kill_arrays()
+    def move_piece(self, pos1: tuple[int, int], pos2: tuple[int, int]):
+        """
+        :param pos1: position of the piece that should be moved
+        :param pos2: target position
 
-        return target_piece
+        :returns: piece that got killed or None
+        """
+        return self.make_move(self.encode_piece_move(pos1, pos2)).target_piece
 
     def replace_pawn(self, piece, replace_with: str):
-        match replace_with:
-            case "T":
-                new_piece = self.pm.Rook(color=piece.color)
-            case "N":
-                new_piece = self.pm.Knight(color=piece.color)
-            case "B":
-                new_piece = self.pm.Bishop(color=piece.color)
-            case "Q":
-                new_piece = self.pm.Queen(color=piece.color)
-
-        new_piece.move_to(piece.cur_pos)
-        self.board[piece.cur_pos] = new_piece
+        """
+        :param piece: the pawn to replace
+        :param replace_with: symbol of the new piece (T, N, B or Q)
+        :returns: the new piece
+        """
+        self.update_outdated_arrays()
+        new_piece = self.pm.new_piece(replace_with, piece.color)
+
+        pos = piece.cur_pos
+        self.remove_piece(pos)
+        self.drop_piece(piece)
+        self.place_piece(new_piece, pos)
+        self.update_piece(new_piece)
+        return new_piece
 
     def pawn_reached_end(self, pos: tuple[int, int]) -> bool:
         """
@@ -388,6 +952,109 @@ class GameBoard:
         return new_dict
 
 
+class CheckInfo:
+    """
+    checks and pins against one king, filled by GameBoard.get_check_info
+    """
+
+    __slots__ = ("hash", "checkers", "check_mask", "pin_rays")
+
+    def __init__(
+        self, position_hash: int, checkers: int, check_mask: int, pin_rays: dict
+    ):
+        self.hash = position_hash
+        # bitboard of the pieces giving check
+        self.checkers = checkers
+        # bitboard of the squares a piece other than the king can move to without leaving the king
+        # in check (the checker and the squares between it and the king), all bits set if not in check
+        self.check_mask = check_mask
+        # square of a pinned piece -> bitboard of the squares from the king to the pinning piece
+        self.pin_rays: dict[int, int] = pin_rays
+
+
+class MoveRecord:
+    """
+    state of the board before a move, filled by GameBoard.make_move
+    """
+
+    __slots__ = (
+        "piece",
+        "move",
+        "pos1",
+        "pos2",
+        "hash",
+        "target_piece",
+        "target_pos",
+        "promoted_piece",
+        "en_passant_possible",
+        "moved",
+        "cleared_pawns",
+        "saved_pieces",
+        "halfmove_clock",
+    )
+
+    def __init__(
+        self,
+        piece,
+        move: int,
+        pos1: tuple[int, int],
+        pos2: tuple[int, int],
+        position_hash: int,
+    ):
+        self.piece = piece
+        self.move = move
+        self.pos1 = pos1
+        self.pos2 = pos2
+        self.hash = position_hash
+
+        self.target_piece = None
+        self.target_pos: tuple[int, int] | None = None
+        self.promoted_piece = None
+
+        self.en_passant_possible: bool = piece.en_passant_possible
+        self.moved: bool = piece.moved
+        self.cleared_pawns: list = []
+
+        self.saved_pieces: list[tuple] = []
+        self.halfmove_clock = 0
+
+    def save_pieces(self, board: GameBoard, pieces: list):
+        """
+        keeps the arrays, attack set and reach set of pieces the move is about to update,
+        the arrays are replaced and not changed in place so keeping references is enough
+        """
+        for piece in pieces:
+            self.saved_pieces.append(
+                (
+                    piece,
+                    piece.strike_array,
+                    piece.numbercode_array,
+                    piece.arrays_outdated,
+                    board.attack_sets.get(piece, 0),
+                    board.reach_sets.get(piece, 0),
+                )
+            )
+
+
+class GameStatus:
+    """
+    result of Game.get_status
+    """
+
+    def __init__(
+        self,
+        state: Literal["ongoing", "checkmate", "stalemate"],
+        loser: Literal["white", "black", "none"],
+        reason: str,
+    ):
+        self.state = state
+        self.loser = loser
+        self.reason = reason
+
+    def __repr__(self):
+        return f"GameStatus({self.state!r}, {self.loser!r}, {self.reason!r})"
+
+
 class Player:
     def __init__(self, color):
         self.color: Literal["black", "white"] = color
@@ -395,10 +1062,22 @@ class Player:
 
 
 class Game:
-    def __init__(self, game_size: int = 8, high_pieces: dict = None):
+    def __init__(
+        self,
+        game_size: int = 8,
+        high_pieces: dict = None,
+        move_cache_size: int = 4096,
+        empty: bool = False,
+    ):
+        """
+        :param game_size: side length of the board
+        :param high_pieces: pieces of the back row and their place, see PieceManager
+        :param move_cache_size: number of legal move lists kept in the move cache, 0 disables it
+        :param empty: start with an empty board, used to load positions
+        """
         self.pm = PieceManager(pieces=high_pieces)
         self.game_size = game_size
-        self.board = GameBoard(self.game_size, self.pm)
+        self.board = GameBoard(self.game_size, self.pm, empty=empty)
         self.player_0 = Player("white")
         self.player_1 = Player("black")
 
@@ -410,25 +1089,285 @@ class Game:
 
         self.in_check = "none"
 
+        # plies since the last capture or pawn move and number of the current move, as in fen
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+
+        self.move_cache = MoveCache(move_cache_size)
+
+        self.status: GameStatus | None = None
+        self.status_hash = 0
+
+    def serialize(self) -> bytes:
+        """
+        packs the position into game_size * game_size + 2 bytes to send it to other processes,
+        the killed pieces are not part of it
+
+        :returns: the board size, the side to move and one byte per square,
+            bits 0-3 are the piece (0 = empty), bit 4 is set if it moved
+            and bit 5 if it can be struck en passant
+        """
+        data = bytearray((self.game_size, COLORS.index(self.cur_player.color)))
+        for square in range(self.game_size * self.game_size):
+            piece = self.board.board[square_to_pos(square, self.game_size)]
+            code = 0
+            if piece is not None:
+                code = 1 + COLORS.index(piece.color) * len(SYMBOLS)
+                code += SYMBOLS.index(piece.sym)
+                code |= piece.moved << 4 | piece.en_passant_possible << 5
+            data.append(code)
+        return bytes(data)
+
+    @classmethod
+    def deserialize(
+        cls, data: bytes, high_pieces: dict = None, move_cache_size: int = 4096
+    ) -> "Game":
+        """
+        :param data: a position packed by serialize
+        :param high_pieces: pieces of the back row and their place, see PieceManager
+        :param move_cache_size: number of legal move lists kept in the move cache, 0 disables it
+        :returns: a new Game with the position
+        """
+        game_size = data[0]
+        if len(data) != game_size * game_size + 2:
+            raise ValueError(
+                f"A serialized {game_size}x{game_size} game has {game_size * game_size + 2} bytes"
+            )
+        game = cls(game_size, high_pieces, move_cache_size, empty=True)
+        board = game.board
+        for square, code in enumerate(data[2:]):
+            if not code:
+                continue
+            color, sym = divmod((code & 0xF) - 1, len(SYMBOLS))
+            piece = game.pm.new_piece(SYMBOLS[sym], COLORS[color])
+            piece.moved = bool(code & 1 << 4)
+            pos = square_to_pos(square, game_size)
+            board.place_piece(piece, pos)
+            if code & 1 << 5:
+                piece.en_passant_possible = True
+                board.hash ^= board.zobrist.en_passant_files[pos[1]]
+        if COLORS[data[1]] != game.cur_player.color:
+            game.cur_player = game.players[1]
+            board.switch_side()
+        board.hash ^= board.get_castling_hash(board.get_castling_rights())
+        board.arrays_outdated = True
+        return game
+
+    @classmethod
+    def from_fen(
+        cls, fen: str, high_pieces: dict = None, move_cache_size: int = 4096
+    ) -> "Game":
+        """
+        builds the position straight from a fen string, the pieces are only placed and
+        their arrays are built the first time moves or attacks are asked for
+
+        :param fen: position in Forsyth-Edwards Notation, the board size is the number of ranks
+        :param high_pieces: pieces of the back row and their place, see PieceManager
+        :param move_cache_size: number of legal move lists kept in the move cache, 0 disables it
+        :returns: a new Game with the position
+        :raises ValueError: if the fen string is not valid
+        """
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError(f"A fen needs at least 4 fields: {fen}")
+        placement, side, castling, en_passant = fields[:4]
+        ranks = placement.split("/")
+        game_size = len(ranks)
+        game = cls(game_size, high_pieces, move_cache_size, empty=True)
+        board = game.board
+
+        for row, rank in enumerate(ranks):
+            col = 0
+            for token in re.findall(r"\d+|.", rank):
+                if token.isdigit():
+                    col += int(token)
+                    continue
+                sym = FEN_SYMBOLS.get(token.lower())
+                if sym is None or col >= game_size:
+                    raise ValueError(f"Invalid rank {rank} in fen {fen}")
+                color = "white" if token.isupper() else "black"
+                piece = game.pm.new_piece(sym, color)
+                if sym == "P":
+                    start_row = board.side - 1 if color == "white" else 1
+                    piece.moved = row != start_row
+                else:
+                    # castling rights are given back below
+                    piece.moved = True
+                # placed without place_piece, the hash is computed once at the end
+                piece.cur_pos = (row, col)
+                board.board[row, col] = piece
+                board.codes[row, col] = PIECE_CODES[(color, sym)]
+                board.bitboards.add(color, sym, pos_to_square((row, col), game_size))
+                col += 1
+            if col != game_size:
+                raise ValueError(
+                    f"Rank {rank} of fen {fen} has not {game_size} squares"
+                )
+
+        if castling != "-":
+            for letter in castling:
+                if letter not in FEN_CASTLING:
+                    raise ValueError(f"Invalid castling rights {castling} in fen {fen}")
+                index, side_index = divmod(FEN_CASTLING.index(letter), 2)
+                color = COLORS[index]
+                row = board.side if color == "white" else 0
+                king = board.bitboards.get(color, "K")
+                rook = board.board[row, side_index * board.side]
+                king_pos = (
+                    square_to_pos(king.bit_length() - 1, game_size) if king else None
+                )
+                if (
+                    king_pos is None
+                    or king_pos[0] != row
+                    or type(rook) is not PieceManager.Rook
+                    or rook.color != color
+                ):
+                    raise ValueError(
+                        f"Castling right {letter} needs the king and rook on their squares"
+                    )
+                board.board[king_pos].moved = False
+                rook.moved = False
+
+        if en_passant != "-":
+            row, col = notation_to_pos(en_passant, game_size)
+            # the pawn passed the square and belongs to the player that moved last
+            row += 1 if side == "w" else -1
+            pawn = board.board[row, col] if 0 <= row < game_size else None
+            if type(pawn) is not PieceManager.Pawn:
+                raise ValueError(f"No pawn passed the en passant square {en_passant}")
+            pawn.en_passant_possible = True
+
+        if side == "b":
+            game.cur_player = game.players[1]
+            board.side_to_move = "black"
+        elif side != "w":
+            raise ValueError(f"Invalid side to move {side} in fen {fen}")
+
+        if len(fields) >= 6:
+            game.halfmove_clock = int(fields[4])
+            game.fullmove_number = int(fields[5])
+
+        board.hash = board.compute_hash()
+        board.arrays_outdated = True
+        return game
+
+    def to_fen(self) -> str:
+        """
+        :returns: the position in Forsyth-Edwards Notation
+        """
+        board = self.board
+        ranks = []
+        for row in range(self.game_size):
+            rank = ""
+            empty = 0
+            for col in range(self.game_size):
+                piece = board.board[row, col]
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                letter = FEN_LETTERS[piece.sym]
+                rank += letter.upper() if piece.color == "white" else letter
+            if empty:
+                rank += str(empty)
+            ranks.append(rank)
+
+        rights = board.get_castling_rights()
+        castling = "".join(
+            letter
+            for bit, letter in sorted(
+                enumerate(FEN_CASTLING), key=lambda item: "KQkq".index(item[1])
+            )
+            if rights >> bit & 1
+        )
+
+        en_passant = "-"
+        for piece in board.iter_pieces():
+            if piece.en_passant_possible:
+                row, col = piece.cur_pos
+                row += 1 if piece.color == "white" else -1
+                en_passant = pos_to_notation((row, col), self.game_size)
+
+        return " ".join(
+            (
+                "/".join(ranks),
+                "w" if self.cur_player.color == "white" else "b",
+                castling or "-",
+                en_passant,
+                str(self.halfmove_clock),
+                str(self.fullmove_number),
+            )
+        )
+
     def move_piece(self, pos1, pos2):
+        pawn_moved = type(self.board.board[pos1]) is PieceManager.Pawn
         killed_piece = self.board.move_piece(pos1, pos2)
+        self.update_halfmove_clock(pawn_moved or killed_piece is not None)
         if killed_piece is not None:
             if killed_piece.color == "white":
                 self.killed_white.append(killed_piece)
             elif killed_piece.color == "black":
                 self.killed_black.append(killed_piece)
 
-    def next_player(self):
+    def update_halfmove_clock(self, reset: bool):
+        """
+        :param reset: True if the last move was a capture or a pawn move
+        """
+        self.halfmove_clock = 0 if reset else self.halfmove_clock + 1
+
+    def next_player(self, record: MoveRecord = None):
+        """
+        :param record: MoveRecord of the last move, unmake_move then restores the en passant chances too
+        """
         if self.cur_player.color == "white":
             self.cur_player = self.players[1]
         else:
             self.cur_player = self.players[0]
+            self.fullmove_number += 1
 
-        for row in self.board.board:
-            for cell in row:
-                if cell is not None:
-                    if cell.color == self.cur_player.color:
-                        cell.en_passant_possible = False
+        self.board.switch_side()
+        self.board.clear_en_passant(self.cur_player.color, record)
+
+    def make_move(self, move: int) -> MoveRecord:
+        """
+        moves a piece and hands the turn to the next player, can be taken back with unmake_move
+        :param move: packed move (see moves.py), e.g. from get_legal_moves
+        :returns: a MoveRecord of the move
+        """
+        record = self.board.make_move(move)
+        record.halfmove_clock = self.halfmove_clock
+        self.update_halfmove_clock(
+            record.target_piece is not None or type(record.piece) is PieceManager.Pawn
+        )
+        if record.target_piece is not None:
+            if record.target_piece.color == "white":
+                self.killed_white.append(record.target_piece)
+            elif record.target_piece.color == "black":
+                self.killed_black.append(record.target_piece)
+        self.next_player(record)
+        return record
+
+    def unmake_move(self, record: MoveRecord):
+        """
+        takes back a move made with make_move and gives the turn back
+        :param record: the MoveRecord returned by make_move
+        """
+        if self.cur_player.color == "white":
+            self.cur_player = self.players[1]
+            self.fullmove_number -= 1
+        else:
+            self.cur_player = self.players[0]
+        self.board.switch_side()
+        self.halfmove_clock = record.halfmove_clock
+
+        if record.target_piece is not None:
+            if record.target_piece.color == "white":
+                self.killed_white.pop()
+            elif record.target_piece.color == "black":
+                self.killed_black.pop()
+        self.board.unmake_move(record)
 
     def test_check(self) -> Literal["both", "black", "white", "none"]:
         """
@@ -438,44 +1377,78 @@ class Game:
 
         if kings_pos[0] == "killed" or kings_pos[1] == "killed":
             return "both"
-        if (
-            self.board.black_kill_array[kings_pos[0]] != 0
-            and self.board.white_kill_array[kings_pos[1]] != 0
-        ):
+        white_in_check = self.board.is_attacked(kings_pos[0], "black")
+        black_in_check = self.board.is_attacked(kings_pos[1], "white")
+        if white_in_check and black_in_check:
             return "both"
-        if self.board.black_kill_array[kings_pos[0]] != 0:
+        if white_in_check:
             return "white"
-        elif self.board.white_kill_array[kings_pos[1]] != 0:
+        elif black_in_check:
             return "black"
         else:
             return "none"
 
     def test_checkmate(self) -> Literal["black", "white", "none"]:
-        if self.in_check != "both" or self.in_check != "none":
-            response = self.all_players_can_move()
-            if not response[0]:
-                return response[1]
-            else:
-                return "none"
+        """
+        :returns: the color of the current player if they are checkmate, none otherwise
+        """
+        status = self.get_status()
+        if status.state == "checkmate":
+            return status.loser
+        return "none"
 
     def test_draw(self) -> bool:
         """
         :returns: True if the game is a draw
         """
-        if self.in_check == "none":
-            return not self.all_players_can_move()[0]
+        return self.get_status().state == "stalemate"
 
     def game_end(self) -> bool:
         """
         :returns: True if the game ends
         """
+        return self.get_status().state != "ongoing"
 
+    def get_status(self) -> "GameStatus":
+        """
+        checks in one pass if the current player is checkmate or stalemate,
+        the search stops at the first legal move of the current player
+        :returns: the GameStatus of the position, only computed once per position
+        """
+        if self.status is not None and self.status_hash == self.board.hash:
+            return self.status
+
+        color = self.cur_player.color
         self.in_check = self.test_check()
+        king_in_check = self.in_check == color or self.in_check == "both"
+
+        if self.has_possible_move(color):
+            status = GameStatus("ongoing", "none", "the current player can move")
+        elif king_in_check:
+            status = GameStatus(
+                "checkmate", color, f"{color} king is in check and can't escape"
+            )
+        else:
+            status = GameStatus(
+                "stalemate", "none", f"{color} can't move but the king is not in check"
+            )
+
+        self.status = status
+        self.status_hash = self.board.hash
+        return status
 
-        if self.test_checkmate() != "none":
-            return True
-        if self.test_draw():
-            return True
+    def has_possible_move(self, color: Literal["white", "black"]) -> bool:
+        """
+        :returns: True as soon as one legal move of the color is found
+        """
+        for piece in list(self.board.iter_pieces(color)):
+            key = (self.board.hash, pos_to_square(piece.cur_pos, self.game_size))
+            cached_moves = self.move_cache.get(key)
+            if cached_moves is not None:
+                if cached_moves:
+                    return True
+            elif self.gen_piece_possible_moves(piece, first_only=True):
+                return True
         return False
 
     def get_piece_possible_moves(
@@ -486,51 +1459,192 @@ class Game:
         :param return_type: specifies the return type of the func
         :returns: an array or a list with possible moves for the piece
         """
-        piece_possible_array = piece.numbercode_array.copy()
-        piece_possible_moves = (
-            list(zip(*np.where(piece.numbercode_array == 1)))
-            + list(zip(*np.where(piece.numbercode_array == 2)))
-            + list(zip(*np.where(piece.numbercode_array == 3)))
-        )
-        piece_possible_moves = [(x.item(), y.item()) for x, y in piece_possible_moves]
-
-        remove_list = []
-
-        for pos in piece_possible_moves:
-            game = deepcopy(self)
-            piece_copy = deepcopy(piece)
-            game.board.move_piece(piece_copy.cur_pos, pos)
-            if game.test_check() == piece_copy.color or game.test_check() == "both":
-                piece_possible_array[pos] = 0
-                remove_list.append(pos)
-
+        self.board.update_outdated_arrays()
+        legal_moves = self.get_piece_legal_moves(piece)
         piece_possible_moves = [
-            item for item in piece_possible_moves if item not in remove_list
+            square_to_pos(move_to(move), self.game_size) for move in legal_moves
         ]
 
         if return_type == "array":
+            self.board.update_outdated_piece_arrays(piece)
+            piece_possible_array = piece.numbercode_array.copy()
+            for x, y in zip(
+                *np.where((piece_possible_array >= 1) & (piece_possible_array <= 3))
+            ):
+                pos = (x.item(), y.item())
+                if pos not in piece_possible_moves:
+                    piece_possible_array[pos] = 0
+            # castling squares are not part of the numbercode array, they are plain moves
+            for move in legal_moves:
+                if move_flags(move) & CASTLING:
+                    piece_possible_array[
+                        square_to_pos(move_to(move), self.game_size)
+                    ] = 1
             return piece_possible_array
         elif return_type == "list":
             return piece_possible_moves
 
+    def get_piece_legal_moves(
+        self, piece, king_danger: int | None = None
+    ) -> tuple[int, ...]:
+        """
+        :param piece: a Piece object from PieceManager Class (e.g. Tower)
+        :param king_danger: see gen_piece_possible_moves
+        :returns: the legal moves of the piece as packed moves, pawns reaching the end are not promoted
+        """
+        # only pieces standing on the board are cached, the hash says nothing about other pieces
+        on_board = self.board.board[piece.cur_pos] is piece
+        key = (self.board.hash, pos_to_square(piece.cur_pos, self.game_size))
+        legal_moves = self.move_cache.get(key) if on_board else None
+        if legal_moves is None:
+            legal_moves = self.gen_piece_possible_moves(piece, king_danger=king_danger)
+            if on_board:
+                self.move_cache.put(key, legal_moves)
+        return legal_moves
+
+    def gen_piece_possible_moves(
+        self, piece, first_only: bool = False, king_danger: int | None = None
+    ) -> tuple[int, ...]:
+        """
+        pieces other than the king only keep the moves allowed by the checks and pins against
+        their king, en passant and king moves without king_danger are tried on the board
+
+        :param piece: a Piece object from PieceManager Class (e.g. Tower)
+        :param first_only: stop after the first legal move
+        :param king_danger: bitboard of the squares the enemy attacks with the king of the piece's
+            color taken off the board, king moves are then checked against it instead of tried
+        :returns: the packed moves of the piece that don't leave the own king in check
+        """
+        self.board.update_outdated_piece_arrays(piece)
+        numbercode_array = piece.numbercode_array
+        rows, cols = np.nonzero((numbercode_array >= 1) & (numbercode_array <= 3))
+        # moves first, then strikes, then en passant moves
+        order = np.argsort(numbercode_array[rows, cols], kind="stable")
+        piece_possible_moves = zip(rows[order].tolist(), cols[order].tolist())
+        square = pos_to_square(piece.cur_pos, self.game_size)
+
+        check_info = None
+        if type(piece) is not PieceManager.King:
+            check_info = self.board.get_check_info(piece.color)
+
+        if check_info is not None:
+            enemy = "black" if piece.color == "white" else "white"
+            allowed = check_info.check_mask & ~self.board.bitboards.get(enemy, "K")
+            allowed &= check_info.pin_rays.get(square, -1)
+        elif king_danger is not None:
+            allowed = ~king_danger
+
+        legal_moves = []
+
+        for pos in piece_possible_moves:
+            target_square = pos_to_square(pos, self.game_size)
+            flags = self.board.get_move_flags(piece, pos)
+            move = encode_move(square, target_square, flags)
+            if (check_info is not None or king_danger is not None) and not (
+                flags & EN_PASSANT
+            ):
+                legal = allowed >> target_square & 1
+            else:
+                legal = self.test_move_on_board(move)
+            if legal:
+                legal_moves.append(move)
+                if first_only:
+                    return tuple(legal_moves)
+
+        if type(piece) is PieceManager.King:
+            # get_castling_moves only returns legal castlings
+            for pos in self.board.get_castling_moves(piece):
+                target_square = pos_to_square(pos, self.game_size)
+                legal_moves.append(encode_move(square, target_square, CASTLING))
+                if first_only:
+                    break
+
+        return tuple(legal_moves)
+
+    def test_move_on_board(self, move: int) -> bool:
+        """
+        makes the move, tests if the own king is in check and takes the move back
+        :param move: packed move (see moves.py)
+        :returns: True if the move doesn't leave the own king in check
+        """
+        record = self.board.make_move(move)
+        in_check = self.test_check()
+        self.board.unmake_move(record)
+        return in_check != record.piece.color and in_check != "both"
+
     def all_players_can_move(self) -> tuple[bool, Literal["black", "white", "none"]]:
         """
         :returns: True and "none" if both players can move or False and the color of the player that can't move
         """
         white = False
         black = False
-        for row in self.board.board:
-            for cell in row:
-                if cell is not None:
-                    movement_list = self.get_piece_possible_moves(cell)
-                    if len(movement_list) > 0:
-                        if cell.color == "white":
-                            white = True
-                        elif cell.color == "black":
-                            black = True
+        for piece in self.board.iter_pieces():
+            movement_list = self.get_piece_possible_moves(piece)
+            if len(movement_list) > 0:
+                if piece.color == "white":
+                    white = True
+                elif piece.color == "black":
+                    black = True
         if white and black:
             return True, "none"
         elif black:
             return False, "white"
         elif white:
             return False, "black"
+
+    def get_legal_moves(
+        self, color: Literal["white", "black"] = None, king_danger: int | None = None
+    ) -> list[int]:
+        """
+        :param color: color of the pieces, the current player if not given
+        :param king_danger: see gen_piece_possible_moves, for the king of the color
+        :returns: every legal move as packed move, a pawn reaching the end gives one move per promotion
+        """
+        if color is None:
+            color = self.cur_player.color
+        moves = []
+        for piece in list(self.board.iter_pieces(color)):
+            for move in self.get_piece_legal_moves(piece, king_danger):
+                if move_flags(move) & PROMOTION:
+                    moves += [
+                        encode_move(
+                            move_from(move), move_to(move), move_flags(move), sym
+                        )
+                        for sym in PROMOTION_ORDER
+                    ]
+                else:
+                    moves.append(move)
+        return moves
+
+    def perft(self, depth: int) -> int:
+        """
+        counts the positions reachable in exactly depth moves, used to check and benchmark the move generation
+        :param depth: number of moves
+        :returns: number of leaf nodes
+        """
+        if depth <= 0:
+            return 1
+        moves = self.get_legal_moves()
+        if depth == 1:
+            return len(moves)
+
+        nodes = 0
+        for move in moves:
+            record = self.make_move(move)
+            nodes += self.perft(depth - 1)
+            self.unmake_move(record)
+        return nodes
+
+    def perft_divide(self, depth: int) -> dict[int, int]:
+        """
+        :param depth: number of moves
+        :returns: the perft count below every legal move of the current player, keyed by packed move
+        """
+        divide = {}
+        if depth <= 0:
+            return divide
+        for move in self.get_legal_moves():
+            record = self.make_move(move)
+            divide[move] = self.perft(depth - 1)
+            self.unmake_move(record)
+        return divide
@@ -1,22 +1,134 @@
-import pygame
-from ui import UiBrain, EventManager
+import argparse
+import os
+import random
+import sys
 import time
+import pygame
+from profiling import profiler
+
+# wake ups per second of a soak test that was started without them
+SOAK_IDLE_FPS = 10
+
+
+def post_soak_clicks(ui, rng: random.Random) -> bool:
+    """
+    posts the clicks of a player who picks random pieces and moves, a finished game is started again
+    :returns: True if a finished game was started again
+    """
+    # like a player, wait until the last click is answered
+    if ui.move_worker is not None and ui.move_worker.busy():
+        return False
+    frame = ui.game_frame
+    if ui.cur_frame != frame:
+        ui.switch_setting_frame()
+    if ui.game_over:
+        ui.new_game()
+        # nothing else wakes up the event loop until the next click is posted
+        pygame.event.post(pygame.event.Event(pygame.USEREVENT))
+        return True
+
+    if frame.pawn_reached_end:
+        tiles = frame.change_tiles
+    else:
+        tiles = [tile for tile in frame.tiles if tile.cur_color == tile.sub_color_code]
+        if not tiles or rng.random() < 0.2:
+            color = frame.game.cur_player.color
+            tiles = [
+                tile
+                for tile in frame.tiles
+                if tile.content is not None and tile.content.color == color
+            ]
+    if tiles:
+        pos = rng.choice(tiles).rect.center
+        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1))
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="chess with a pygame window")
+    parser.add_argument(
+        "--fps",
+        type=int,
+        default=60,
+        help="most frames drawn per second, 0 draws as fast as possible",
+    )
+    parser.add_argument(
+        "--idle-fps",
+        type=int,
+        default=2,
+        help="wake ups per second without events, 0 sleeps until the next event",
+    )
+    parser.add_argument(
+        "--stats", action="store_true", help="show the frame rate in the window"
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="run without a window (SDL dummy video driver)",
+    )
+    parser.add_argument(
+        "--soak",
+        type=float,
+        default=None,
+        help="play random clicks for that many seconds, then print the stats and exit",
+    )
+    parser.add_argument(
+        "--profile",
+        type=float,
+        default=float(os.environ.get("CHESS_PROFILE") or 0),
+        help="time the rule methods and write a report to stderr every that many seconds",
+    )
+    args = parser.parse_args()
+
+    if args.headless:
+        # has to be set before pygame opens the display, ui does that on import
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+    if args.profile:
+        profiler.enable()
+        profiler.start_report(args.profile)
 
-pygame.init()
+    from ui import EventManager, UiBrain
 
-ui = UiBrain()
+    pygame.init()
 
-em = EventManager(ui)
+    idle_fps = args.idle_fps
+    if args.soak is not None and idle_fps <= 0:
+        # the deadline of the soak test is only checked when the loop wakes up
+        idle_fps = SOAK_IDLE_FPS
+    ui = UiBrain(tickrate=args.fps, idle_tickrate=idle_fps, show_stats=args.stats)
+    em = EventManager(ui)
 
-clock = pygame.time.Clock()
+    on_loop = None
+    games = 0
+    if args.soak is not None:
+        rng = random.Random()
+        deadline = time.perf_counter() + args.soak
 
-while True:
-    start = time.time()
+        def on_loop():
+            nonlocal games
+            if time.perf_counter() >= deadline:
+                ui.running = False
+            elif post_soak_clicks(ui, rng):
+                games += 1
 
-    ui.update_background()
+    start = time.perf_counter()
+    ui.run(em, on_loop)
+    seconds = time.perf_counter() - start
+    pygame.quit()
 
-    em.manage_events(pygame.event.get())
+    if args.soak is not None:
+        stats = ui.stats
+        print(
+            f"seconds {seconds:.1f} loops {stats['loops']} frames {stats['frames']}"
+            f" events {stats['events']} fps {stats['frames'] / seconds:.1f}"
+            f" finished games {games}",
+            file=sys.stderr,
+        )
+    if args.profile:
+        profiler.disable()
+        profiler.report()
 
-    ui.mainloop()
 
-    print(f"{1 / (time.time() - start):.2f}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+from collections import OrderedDict
+
+
+class MoveCache:
+    """
+    least recently used cache for the legal moves of a piece, keyed by the zobrist hash
+    of the position and the square of the piece. Every change of the board changes the hash,
+    so entries of older positions are never hit again and age out of the cache
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        """
+        :param maxsize: maximum number of stored move lists, 0 disables the cache
+        """
+        self.maxsize = maxsize
+        self.entries: OrderedDict[tuple[int, int], tuple] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple[int, int]) -> tuple | None:
+        """
+        :param key: (position hash, square)
+        :returns: the stored moves or None if the key is not cached
+        """
+        moves = self.entries.get(key)
+        if moves is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return moves
+
+    def put(self, key: tuple[int, int], moves: tuple):
+        """
+        :param key: (position hash, square)
+        :param moves: the legal moves of the piece
+        """
+        if self.maxsize <= 0:
+            return
+        self.entries[key] = moves
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        :returns: size, limit, hit and miss counters of the cache
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
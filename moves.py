@@ -0,0 +1,86 @@
+from bitboard import pos_to_square, square_to_pos
+
+# a move is packed into a single int:
+# bits 0-7 = square the piece moves from
+# bits 8-15 = square the piece moves to
+# bits 16-20 = flags
+# bits 21-23 = piece a pawn is promoted to (0 = no promotion)
+# squares are indices as in bitboard.pos_to_square, so boards up to 16x16 fit
+
+QUIET = 0
+CAPTURE = 1
+EN_PASSANT = 2
+DOUBLE_PUSH = 4
+PROMOTION = 8
+# the king moves two squares towards a rook, the rook jumps over it
+CASTLING = 16
+
+PROMOTION_SYMBOLS: tuple[str, ...] = ("", "T", "N", "B", "Q")
+PROMOTION_CODES: dict[str, int] = {
+    sym: code for code, sym in enumerate(PROMOTION_SYMBOLS) if sym
+}
+
+
+def encode_move(
+    from_square: int, to_square: int, flags: int = QUIET, promotion: str = ""
+) -> int:
+    """
+    :param from_square: square the piece moves from
+    :param to_square: square the piece moves to
+    :param flags: QUIET or a combination of CAPTURE, EN_PASSANT, DOUBLE_PUSH, PROMOTION and CASTLING
+    :param promotion: symbol of the piece a pawn is promoted to (e.g. Q)
+    :returns: the packed move
+    """
+    if promotion:
+        flags |= PROMOTION
+    return (
+        from_square
+        | to_square << 8
+        | flags << 16
+        | PROMOTION_CODES.get(promotion, 0) << 21
+    )
+
+
+def move_from(move: int) -> int:
+    return move & 0xFF
+
+
+def move_to(move: int) -> int:
+    return move >> 8 & 0xFF
+
+
+def move_flags(move: int) -> int:
+    return move >> 16 & 0x1F
+
+
+def move_promotion(move: int) -> str:
+    """
+    :returns: symbol of the piece the pawn is promoted to or an empty string
+    """
+    return PROMOTION_SYMBOLS[move >> 21 & 0x7]
+
+
+def move_to_positions(
+    move: int, game_size: int
+) -> tuple[tuple[int, int], tuple[int, int]]:
+    """
+    :returns: position tuples of the from and to square
+    """
+    return square_to_pos(move & 0xFF, game_size), square_to_pos(
+        move >> 8 & 0xFF, game_size
+    )
+
+
+def positions_to_move(
+    pos1: tuple[int, int],
+    pos2: tuple[int, int],
+    game_size: int,
+    flags: int = QUIET,
+    promotion: str = "",
+) -> int:
+    """
+    :returns: the packed move from pos1 to pos2
+    """
+    return encode_move(
+        pos_to_square(pos1, game_size), pos_to_square(pos2, game_size), flags, promotion
+    )
@@ -0,0 +1,162 @@
+import argparse
+import multiprocessing
+import os
+import time
+from engine import (
+    INFINITY,
+    SearchEngine,
+    SearchResult,
+    SearchStopped,
+    evaluate,
+    print_iteration,
+    score_from_table,
+)
+from game import START_FEN, Game, move_to_notation
+
+# game and engine of a worker process, built once per worker from the serialized position
+worker_game: Game | None = None
+worker_engine: SearchEngine | None = None
+
+
+def init_worker(position: bytes, hash_mb: float):
+    """
+    :param position: the root position packed by Game.serialize
+    :param hash_mb: memory cap of the transposition table of the worker
+    """
+    global worker_game, worker_engine
+    worker_game = Game.deserialize(position)
+    worker_engine = SearchEngine(worker_game, hash_mb=hash_mb)
+
+
+def search_root_move(
+    task: tuple[int, int, float | None, int | None],
+) -> tuple[int, int, list[int], int, int]:
+    """
+    runs in a worker and searches the position after one root move, the worker's
+    transposition table is kept for the next root move it gets
+
+    :param task: (packed move, depth, deadline as time.time() or None, node limit or None)
+    :returns: (move, score for the root player, principal variation after the move,
+        depth that was finished, nodes)
+    """
+    move, depth, deadline, node_limit = task
+    game = worker_game
+    engine = worker_engine
+    time_limit = None if deadline is None else max(0.0, deadline - time.time())
+
+    record = game.make_move(move)
+    try:
+        if depth > 1:
+            result = engine.search(
+                max_depth=depth - 1, time_limit=time_limit, node_limit=node_limit
+            )
+            score, pv, nodes = result.score, result.pv, result.nodes
+            if result.move is None:
+                # a position without moves is finished at any depth
+                finished = depth
+            elif result.depth == 0:
+                # the budget ran out before the first iteration finished
+                finished = 0
+                score = evaluate(game)
+            else:
+                finished = result.depth + 1
+        else:
+            engine.start(time_limit, node_limit)
+            pv = []
+            try:
+                score = engine.quiescence(-INFINITY, INFINITY, 0)
+                finished = 1
+            except SearchStopped:
+                score = evaluate(game)
+                finished = 0
+            nodes = engine.nodes
+    finally:
+        game.unmake_move(record)
+
+    # the score of the other player one ply further from the root
+    return move, score_from_table(-score, 1), pv, finished, nodes
+
+
+def parallel_search(
+    game: Game,
+    depth: int,
+    processes: int | None = None,
+    time_limit: float | None = None,
+    node_limit: int | None = None,
+    hash_mb: float = 16,
+) -> SearchResult:
+    """
+    splits the root moves over a process pool, every worker gets the position as the few
+    bytes of Game.serialize and searches the root moves it is handed one after another
+
+    :param game: the position to search, it is not changed
+    :param depth: depth of the search including the root move
+    :param processes: number of worker processes, all cores if not given
+    :param time_limit: seconds the search may take
+    :param node_limit: nodes each root move may take
+    :param hash_mb: memory cap of the transposition table of each worker
+    :returns: the best root move, depth is the lowest depth finished for any root move
+    """
+    start = time.perf_counter()
+    moves = game.get_legal_moves()
+    if not moves:
+        return SearchEngine(game, hash_mb=0).search(max_depth=1)
+
+    deadline = None if time_limit is None else time.time() + time_limit
+    # the most promising moves are handed out first
+    moves = SearchEngine(game, hash_mb=0).order_moves(moves, 0)
+    tasks = [(move, depth, deadline, node_limit) for move in moves]
+
+    processes = min(processes or os.cpu_count() or 1, len(tasks))
+    with multiprocessing.Pool(
+        processes, initializer=init_worker, initargs=(game.serialize(), hash_mb)
+    ) as pool:
+        results = pool.map(search_root_move, tasks, chunksize=1)
+
+    move, score, pv, _, _ = max(results, key=lambda result: result[1])
+    return SearchResult(
+        move,
+        score,
+        min(result[3] for result in results),
+        sum(result[4] for result in results),
+        time.perf_counter() - start,
+        [move] + pv,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="search a position with one worker process per core"
+    )
+    parser.add_argument("depth", type=int, nargs="?", default=4)
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="worker processes, all cores if not given",
+    )
+    parser.add_argument("--time", type=float, default=None, help="seconds per move")
+    parser.add_argument("--fen", default=START_FEN, help="position to search")
+    parser.add_argument(
+        "--hash",
+        type=float,
+        default=16,
+        help="megabytes of the transposition table per worker",
+    )
+    args = parser.parse_args()
+
+    game = Game.from_fen(args.fen)
+    result = parallel_search(
+        game,
+        args.depth,
+        processes=args.processes,
+        time_limit=args.time,
+        hash_mb=args.hash,
+    )
+    print_iteration(result, game.game_size)
+    if result.move is not None:
+        print(f"bestmove {move_to_notation(result.move, game.game_size)}")
+
+
+if __name__ == "__main__":
+    main()
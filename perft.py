@@ -0,0 +1,206 @@
+import argparse
+import time
+from functools import partial
+from game import Game, move_to_notation
+
+# known leaf counts by depth, see https://www.chessprogramming.org/Perft_Results
+REFERENCE_POSITIONS: dict[str, tuple[callable, dict[int, int]]] = {
+    "startpos": (
+        Game,
+        {1: 20, 2: 400, 3: 8902, 4: 197281, 5: 4865609},
+    ),
+    "kiwipete": (
+        partial(
+            Game.from_fen,
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        ),
+        {1: 48, 2: 2039, 3: 97862, 4: 4085603},
+    ),
+    "position3": (
+        partial(Game.from_fen, "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"),
+        {1: 14, 2: 191, 3: 2812, 4: 43238, 5: 674624},
+    ),
+    "position4": (
+        partial(
+            Game.from_fen,
+            "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        ),
+        {1: 6, 2: 264, 3: 9467, 4: 422333},
+    ),
+    "position5": (
+        partial(
+            Game.from_fen, "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8"
+        ),
+        {1: 44, 2: 1486, 3: 62379, 4: 2103487},
+    ),
+    "position6": (
+        partial(
+            Game.from_fen,
+            "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+        ),
+        {1: 46, 2: 2079, 3: 89890, 4: 3894594},
+    ),
+    # castling on both sides with all rights, with some rights gone, with rooks that can be
+    # captured and with kings that may not castle out of or through check
+    "castling": (
+        partial(Game.from_fen, "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1"),
+        {1: 26, 2: 568, 3: 13744, 4: 314346},
+    ),
+    "castling_rights": (
+        partial(Game.from_fen, "1r2k2r/8/8/8/8/8/8/R3K2R w KQk - 0 1"),
+        {1: 26, 2: 583, 3: 14252, 4: 334705},
+    ),
+    "castling_captures": (
+        partial(Game.from_fen, "r3k2r/1b4bq/8/8/8/8/7B/R3K2R w KQkq - 0 1"),
+        {1: 26, 2: 1141, 3: 27826, 4: 1274206},
+    ),
+    "castling_checks": (
+        partial(Game.from_fen, "r3k2r/8/3Q4/8/8/5q2/8/R3K2R b KQkq - 0 1"),
+        {1: 44, 2: 1494, 3: 50509, 4: 1720476},
+    ),
+}
+# more positions whose moves unmake_move has to take back without leaving anything behind,
+# position5 after c4a6 f7f5, white promotes right after a double push of black
+UNMAKE_POSITIONS: dict[str, callable] = {
+    "promotion_after_double_push": partial(
+        Game.from_fen, "rnbq1k1r/pp1Pb1pp/B1p5/5p2/8/8/PPP1NnPP/RNBQK2R w KQ f6 0 9"
+    ),
+}
+# the state check compares the whole board after every move, so it stays shallow
+UNMAKE_DEPTH = 2
+
+
+def run_perft(game: Game, depth: int) -> tuple[int, float]:
+    """
+    :returns: the leaf count and the seconds it took
+    """
+    start = time.perf_counter()
+    nodes = game.perft(depth)
+    return nodes, time.perf_counter() - start
+
+
+def print_divide(game: Game, depth: int):
+    """
+    prints the leaf count below every move of the current player
+    """
+    divide = game.perft_divide(depth)
+    notations = {
+        move_to_notation(move, game.game_size): n for move, n in divide.items()
+    }
+    for move, nodes in sorted(notations.items()):
+        print(f"{move}: {nodes}")
+    print(f"\nMoves: {len(divide)}")
+    print(f"Nodes: {sum(divide.values())}")
+
+
+def get_board_state(game: Game) -> tuple:
+    """
+    :returns: everything make_move changes on the board and unmake_move has to restore
+    """
+    board = game.board
+    board.update_outdated_arrays()
+    return (
+        board.hash,
+        board.codes.tobytes(),
+        dict(board.attack_sets),
+        dict(board.reach_sets),
+        {color: list(counts) for color, counts in board.attack_counts.items()},
+    )
+
+
+def check_unmake(game: Game, depth: int, line: tuple[str, ...] = ()) -> list[str]:
+    """
+    makes and takes back every move up to depth and compares the board state before and after
+    :returns: the move lines after which the state was not restored
+    """
+    if depth <= 0:
+        return []
+    failed = []
+    state = get_board_state(game)
+    for move in game.get_legal_moves():
+        move_line = line + (move_to_notation(move, game.game_size),)
+        record = game.make_move(move)
+        failed += check_unmake(game, depth - 1, move_line)
+        game.unmake_move(record)
+        if get_board_state(game) != state:
+            failed.append(" ".join(move_line))
+            state = get_board_state(game)
+    return failed
+
+
+def check_positions(names: list[str], max_depth: int) -> bool:
+    """
+    runs perft on the reference positions up to max_depth and compares with the known counts,
+    then checks that unmake_move restores the board state
+    :returns: True if every count matched and every move was taken back
+    """
+    all_passed = True
+    for name in names:
+        new_game, counts = REFERENCE_POSITIONS[name]
+        for depth, expected in counts.items():
+            if depth > max_depth:
+                break
+            nodes, seconds = run_perft(new_game(), depth)
+            passed = nodes == expected
+            all_passed = all_passed and passed
+            print(
+                f"{'ok  ' if passed else 'FAIL'} {name} depth {depth}: {nodes} nodes"
+                f" (expected {expected}) {seconds:.2f}s {nodes / seconds:.0f} nodes/s"
+            )
+    unmake_positions = {name: REFERENCE_POSITIONS[name][0] for name in names}
+    unmake_positions.update(UNMAKE_POSITIONS)
+    depth = min(max_depth, UNMAKE_DEPTH)
+    for name in sorted(unmake_positions):
+        failed = check_unmake(unmake_positions[name](), depth)
+        all_passed = all_passed and not failed
+        print(
+            f"{'ok  ' if not failed else 'FAIL'} {name} unmake depth {depth}:"
+            f" {len(failed)} moves not taken back"
+            + (f", first {failed[0]}" if failed else "")
+        )
+    return all_passed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="count the leaf nodes of the move generator to test it and measure its speed"
+    )
+    parser.add_argument("depth", type=int, nargs="?", default=3)
+    parser.add_argument(
+        "--position",
+        choices=sorted(REFERENCE_POSITIONS),
+        default="startpos",
+        help="position to start from",
+    )
+    parser.add_argument("--fen", help="start from this position instead")
+    parser.add_argument(
+        "--divide", action="store_true", help="print the count below every move"
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="compare every reference position up to depth with the known counts",
+    )
+    args = parser.parse_args()
+    if args.depth < 1:
+        parser.error("depth must be at least 1")
+
+    if args.check:
+        passed = check_positions(sorted(REFERENCE_POSITIONS), args.depth)
+        raise SystemExit(0 if passed else 1)
+
+    if args.fen:
+        game = Game.from_fen(args.fen)
+    else:
+        game = REFERENCE_POSITIONS[args.position][0]()
+    if args.divide:
+        print_divide(game, args.depth)
+    else:
+        nodes, seconds = run_perft(game, args.depth)
+        print(f"Nodes: {nodes}")
+        print(f"Time: {seconds:.3f}s")
+        print(f"Nodes/s: {nodes / seconds:.0f}")
+
+
+if __name__ == "__main__":
+    main()
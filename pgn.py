@@ -0,0 +1,330 @@
+import argparse
+import json
+import multiprocessing
+import re
+import sys
+from collections import deque
+from itertools import islice
+from typing import Iterable, Iterator, TextIO
+from game import Game, notation_to_pos
+from moves import CASTLING, move_flags, move_promotion, move_to_positions
+
+# pgn piece letters, the rook is called tower (T) in this game
+PGN_SYMBOLS: dict[str, str] = {"K": "K", "Q": "Q", "R": "T", "B": "B", "N": "N"}
+RESULTS: tuple[str, ...] = ("1-0", "0-1", "1/2-1/2", "*")
+
+TAG_PATTERN = re.compile(r'\[(\w+)\s+"((?:[^"\\]|\\.)*)"\]')
+# comments, variations and annotation glyphs are skipped, move numbers are dropped
+TOKEN_PATTERN = re.compile(r"\{[^}]*\}|;[^\n]*|\(|\)|\$\d+|\d+\.(?:\.\.)?|[^\s(){};]+")
+# files go up to p, packed moves fit boards of up to 16x16
+SAN_PATTERN = re.compile(
+    r"^([KQRBN])?([a-p])?(\d+)?x?([a-p]\d+)(?:=?([QRBN]))?[+#]?[!?]*$"
+)
+CASTLING_PATTERN = re.compile(r"^([O0]-[O0](-[O0])?)[+#]?[!?]*$")
+
+
+def in_comment_after(line: str, in_comment: bool) -> bool:
+    """
+    :param line: a line of movetext
+    :param in_comment: True if the line starts inside a { } comment
+    :returns: True if a { } comment is still open at the end of the line
+    """
+    for char in line:
+        if in_comment:
+            in_comment = char != "}"
+        elif char == "{":
+            in_comment = True
+        elif char == ";":
+            # the rest of the line is a comment
+            break
+    return in_comment
+
+
+def is_tag_line(stripped: str, in_comment: bool) -> bool:
+    """
+    :returns: True if the stripped line is a tag and not e.g. [%clk 0:03:00] inside a comment
+    """
+    return not in_comment and TAG_PATTERN.fullmatch(stripped) is not None
+
+
+def split_games(lines: Iterable[str]) -> Iterator[str]:
+    """
+    cuts a pgn stream into games without reading more than one game at a time
+
+    :param lines: lines of a pgn file, e.g. the open file itself
+    :returns: a generator of the text of every game (tags and moves)
+    """
+    game_lines = []
+    in_moves = False
+    in_comment = False
+    for line in lines:
+        stripped = line.strip()
+        is_tag = is_tag_line(stripped, in_comment)
+        # a tag after the moves starts the next game
+        if is_tag and in_moves:
+            yield "".join(game_lines)
+            game_lines = []
+            in_moves = False
+        if stripped and not is_tag:
+            in_moves = True
+            in_comment = in_comment_after(line, in_comment)
+        game_lines.append(line)
+    if any(line.strip() for line in game_lines):
+        yield "".join(game_lines)
+
+
+def parse_game(text: str) -> tuple[dict[str, str], list[str], str]:
+    """
+    :param text: one game as returned by split_games
+    :returns: the tags, the moves in standard algebraic notation and the result
+    """
+    tags = {}
+    movetext = []
+    in_comment = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if is_tag_line(stripped, in_comment):
+            match = TAG_PATTERN.fullmatch(stripped)
+            tags[match.group(1)] = match.group(2).replace('\\"', '"')
+        elif in_comment or not stripped.startswith("%"):
+            movetext.append(line)
+            in_comment = in_comment_after(line, in_comment)
+
+    sans = []
+    result = tags.get("Result", "*")
+    depth = 0
+    for token in TOKEN_PATTERN.findall("\n".join(movetext)):
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth = max(0, depth - 1)
+        elif depth or token[0] in "{;$" or token[0].isdigit() and token.endswith("."):
+            continue
+        elif token in RESULTS:
+            result = token
+        else:
+            sans.append(token)
+    return tags, sans, result
+
+
+def san_to_move(game: Game, san: str) -> int:
+    """
+    :param game: the game the move is played in
+    :param san: move in standard algebraic notation (e.g. Nf3, exd5, e8=Q or O-O)
+    :returns: the packed legal move of the current player
+    :raises ValueError: if the move is malformed, illegal or ambiguous
+    """
+    game_size = game.game_size
+    board = game.board.board
+    legal_moves = game.get_legal_moves()
+
+    castling = CASTLING_PATTERN.match(san)
+    if castling:
+        long_castling = castling.group(2) is not None
+        candidates = []
+        for move in legal_moves:
+            if move_flags(move) & CASTLING:
+                pos1, pos2 = move_to_positions(move, game_size)
+                if (pos2[1] < pos1[1]) == long_castling:
+                    candidates.append(move)
+    else:
+        match = SAN_PATTERN.match(san)
+        if match is None:
+            raise ValueError(f"Can't read the move {san}")
+        letter, from_file, from_rank, target, promotion = match.groups()
+        sym = PGN_SYMBOLS[letter] if letter else "P"
+        target_pos = notation_to_pos(target, game_size)
+        promotion = PGN_SYMBOLS[promotion] if promotion else ""
+
+        candidates = []
+        for move in legal_moves:
+            pos1, pos2 = move_to_positions(move, game_size)
+            if pos2 != target_pos or board[pos1].sym != sym:
+                continue
+            if move_promotion(move) != promotion or move_flags(move) & CASTLING:
+                continue
+            if from_file is not None and pos1[1] != ord(from_file) - ord("a"):
+                continue
+            if from_rank is not None and pos1[0] != game_size - int(from_rank):
+                continue
+            candidates.append(move)
+
+    if not candidates:
+        raise ValueError(f"{san} is not a legal move")
+    if len(candidates) > 1:
+        raise ValueError(f"{san} is ambiguous")
+    return candidates[0]
+
+
+def analyse_game(text: str) -> dict:
+    """
+    replays one game and validates every move
+
+    :param text: one game as returned by split_games
+    :returns: the tags that name the game and the statistics of the replay,
+        valid is False and error says why if a move could not be played
+    """
+    tags, sans, result = parse_game(text)
+    stats = {
+        "event": tags.get("Event", "?"),
+        "white": tags.get("White", "?"),
+        "black": tags.get("Black", "?"),
+        "result": result,
+        "valid": True,
+        "error": None,
+        "plies": 0,
+        "moves": 0,
+        "checks": 0,
+        "captures_white": 0,
+        "captures_black": 0,
+        "promotions": 0,
+        "castlings": 0,
+        "end": "ongoing",
+    }
+
+    try:
+        game = Game.from_fen(tags["FEN"]) if "FEN" in tags else Game()
+    except ValueError as error:
+        stats["valid"] = False
+        stats["error"] = f"FEN: {error}"
+        return stats
+
+    first_move_number = game.fullmove_number
+    for ply, san in enumerate(sans, 1):
+        try:
+            move = san_to_move(game, san)
+        except ValueError as error:
+            stats["valid"] = False
+            stats["error"] = f"ply {ply}: {error}"
+            break
+        game.make_move(move)
+        stats["plies"] = ply
+        if game.test_check() != "none":
+            stats["checks"] += 1
+        if move_promotion(move):
+            stats["promotions"] += 1
+        if move_flags(move) & CASTLING:
+            stats["castlings"] += 1
+
+    if stats["plies"]:
+        # the number of the last move, it only went up already if black played last
+        last_move_number = game.fullmove_number
+        if game.cur_player.color == "white":
+            last_move_number -= 1
+        stats["moves"] = last_move_number - first_move_number + 1
+    # pieces each side took
+    stats["captures_white"] = len(game.killed_black)
+    stats["captures_black"] = len(game.killed_white)
+
+    status = game.get_status()
+    stats["end"] = status.state
+    if stats["valid"]:
+        if status.state == "checkmate":
+            expected = "0-1" if status.loser == "white" else "1-0"
+        elif status.state == "stalemate":
+            expected = "1/2-1/2"
+        else:
+            expected = None
+        if expected is not None and result not in (expected, "*"):
+            stats["valid"] = False
+            stats["error"] = (
+                f"the game ends in {status.state} but the result is {result}"
+            )
+    return stats
+
+
+def analyse_games(texts: list[str]) -> list[dict]:
+    return [analyse_game(text) for text in texts]
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def analyse_stream(
+    games: Iterable[str], processes: int = 1, chunk_size: int = 64
+) -> Iterator[dict]:
+    """
+    analyses the games in order, with more than one process the games are handed out in chunks
+    and only a few chunks per process are in flight, so memory stays constant for any number of games
+
+    :param games: texts of the games, e.g. from split_games
+    :param processes: number of worker processes, 1 analyses in this process
+    :param chunk_size: games sent to a worker at once
+    :returns: a generator of the statistics of every game
+    """
+    if processes <= 1:
+        for text in games:
+            yield analyse_game(text)
+        return
+
+    max_pending = processes * 2
+    with multiprocessing.Pool(processes) as pool:
+        pending = deque()
+        for batch in batched(games, chunk_size):
+            pending.append(pool.apply_async(analyse_games, (batch,)))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
+
+def read_lines(paths: list[str]) -> Iterator[str]:
+    """
+    :param paths: pgn files, - reads from stdin
+    :returns: a generator of the lines of all files one after another
+    """
+    for path in paths:
+        if path == "-":
+            yield from sys.stdin
+            continue
+        with open(path, encoding="utf-8", errors="replace") as file:
+            yield from file
+
+
+def write_results(results: Iterable[dict], output: TextIO) -> dict[str, int]:
+    """
+    writes every result as one json line as soon as it is ready
+
+    :returns: totals over all games
+    """
+    totals = {"games": 0, "valid": 0, "invalid": 0, "plies": 0}
+    for index, stats in enumerate(results, 1):
+        output.write(json.dumps({"game": index, **stats}) + "\n")
+        totals["games"] += 1
+        totals["valid" if stats["valid"] else "invalid"] += 1
+        totals["plies"] += stats["plies"]
+        totals[stats["result"]] = totals.get(stats["result"], 0) + 1
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="replay pgn games, validate every move and write statistics as json lines"
+    )
+    parser.add_argument("files", nargs="+", help="pgn files, - reads from stdin")
+    parser.add_argument(
+        "-o", "--output", default="-", help="output file, stdout if not given"
+    )
+    parser.add_argument(
+        "--processes", type=int, default=1, help="worker processes that replay games"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=64, help="games sent to a worker at once"
+    )
+    args = parser.parse_args()
+
+    games = split_games(read_lines(args.files))
+    results = analyse_stream(games, args.processes, args.chunk_size)
+    if args.output == "-":
+        totals = write_results(results, sys.stdout)
+    else:
+        with open(args.output, "w", encoding="utf-8") as output:
+            totals = write_results(results, output)
+    print(" ".join(f"{key} {value}" for key, value in totals.items()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
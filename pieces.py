@@ -1,12 +1,74 @@
-from typing import Literal
+from typing import Literal, NamedTuple
+from functools import lru_cache
 import numpy as np
 
+ORTHOGONAL: tuple[tuple[int, int], ...] = ((-1, 0), (1, 0), (0, -1), (0, 1))
+DIAGONAL: tuple[tuple[int, int], ...] = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+# offsets of a white pawn, black pawns use the inverted offsets
+PAWN_POSSIBLE_POS: tuple[tuple[int, int], ...] = ((-1, 0), (-2, 0))
+PAWN_POSSIBLE_STRIKES: tuple[tuple[int, int], ...] = ((-1, 1), (-1, -1))
+
+
+# arrays of a piece that is not on a board yet, the GameBoard replaces them instead of
+# changing them in place so every piece can share it
+EMPTY_ARRAY: np.typing.NDArray = np.zeros(shape=(0, 0), dtype=np.int8)
+
 
 def invert_pos(pos_list):
     return [(pos[0] * (-1), pos[1] * (-1)) for pos in pos_list]
 
 
+class PieceKind(NamedTuple):
+    """
+    immutable description of a piece type of one color, shared by every piece of that type and color
+    """
+
+    sym: str
+    color: Literal["white", "black"]
+    possible_pos: tuple[tuple[int, int], ...]
+    possible_strikes: tuple[tuple[int, int], ...]
+    can_jump: bool
+
+
+@lru_cache(maxsize=None)
+def get_piece_kind(
+    sym: str,
+    color: str,
+    possible_pos: tuple[tuple[int, int], ...],
+    possible_strikes: tuple[tuple[int, int], ...],
+    can_jump: bool,
+) -> PieceKind:
+    """
+    :param possible_pos: offsets as seen from white, inverted for black
+    :param possible_strikes: offsets as seen from white, inverted for black
+    :returns: the shared PieceKind
+    """
+    if color == "black":
+        possible_pos = tuple(invert_pos(possible_pos))
+        possible_strikes = tuple(invert_pos(possible_strikes))
+    elif color != "white":
+        raise ValueError("Only black or white are allowed as colores!")
+    return PieceKind(sym, color, possible_pos, possible_strikes, can_jump)
+
+
 class Piece:
+    # only the state that changes during a game is stored per piece, the rest lives in the shared kind
+    __slots__ = (
+        "kind",
+        "cur_pos",
+        "moved",
+        "en_passant_possible",
+        "strike_array",
+        "numbercode_array",
+        "arrays_outdated",
+    )
+
+    sym = ""
+    # directions the piece slides in until it is blocked, pieces without directions
+    # (Knight, King, Pawn) take their moves from the attack tables of the GameBoard
+    directions: tuple[tuple[int, int], ...] = ()
+
     def __init__(
         self,
         possible_pos: list[tuple[int, int]],
@@ -14,36 +76,42 @@ class Piece:
         color: Literal["white", "black"],
         can_jump=False,
     ):
+        self.kind = get_piece_kind(
+            self.sym,
+            color.lower(),
+            tuple(possible_pos),
+            tuple(possible_strikes),
+            can_jump,
+        )
         self.cur_pos: tuple[int, int] = (0, 0)
-        self.color = color.lower()
-        self.can_jump = can_jump
+        self.moved = False
         self.en_passant_possible = False
-        if self.color == "black":
-            self.possible_pos: list[tuple[int, int]] = invert_pos(possible_pos)
-            self.possible_strikes: list[tuple[int, int]] = invert_pos(possible_strikes)
-        elif self.color == "white":
-            self.possible_pos: list[tuple[int, int]] = possible_pos
-            self.possible_strikes: list[tuple[int, int]] = possible_strikes
-        else:
-            raise ValueError("Only black or white are allowed as colores!")
 
-        self.strike_array: np.typing.NDArray = np.zeros(shape=(0, 0), dtype=int)
-        self.numbercode_array: np.typing.NDArray = np.zeros(shape=(0, 0), dtype=int)
+        self.strike_array: np.typing.NDArray = EMPTY_ARRAY
+        self.numbercode_array: np.typing.NDArray = EMPTY_ARRAY
+        # set by the GameBoard when a change of the board made the arrays wrong
+        self.arrays_outdated = True
+
+    @property
+    def color(self) -> Literal["white", "black"]:
+        return self.kind.color
+
+    @property
+    def can_jump(self) -> bool:
+        return self.kind.can_jump
+
+    @property
+    def possible_pos(self) -> tuple[tuple[int, int], ...]:
+        return self.kind.possible_pos
+
+    @property
+    def possible_strikes(self) -> tuple[tuple[int, int], ...]:
+        return self.kind.possible_strikes
 
     def move_to(self, pos: tuple[int, int]):
-        x_diff = pos[0] - self.cur_pos[0]
-        y_diff = pos[1] - self.cur_pos[1]
-
-        new_possible_pos = [
-            (old_pos[0] + x_diff, old_pos[1] + y_diff) for old_pos in self.possible_pos
-        ]
-        new_possible_strikes = [
-            (old_pos[0] + x_diff, old_pos[1] + y_diff)
-            for old_pos in self.possible_strikes
-        ]
-
-        self.possible_pos = new_possible_pos
-        self.possible_strikes = new_possible_strikes
+        """
+        :param pos: new position of the piece, possible_pos and possible_strikes stay relative to it
+        """
         self.cur_pos = pos
 
 
@@ -87,6 +155,13 @@ def gen_possible_pos_king() -> list[tuple[int, int]]:
     return drop_duplicates(new_possible_pos)
 
 
+ROOK_POSSIBLE_POS = tuple(gen_possible_pos_tower())
+KNIGHT_POSSIBLE_POS = tuple(gen_possible_pos_knight())
+BISHOP_POSSIBLE_POS = tuple(gen_possible_pos_bishop())
+QUEEN_POSSIBLE_POS = ROOK_POSSIBLE_POS + BISHOP_POSSIBLE_POS
+KING_POSSIBLE_POS = tuple(gen_possible_pos_king())
+
+
 def check_key(dictionary, key, response=None):
     try:
         value = dictionary[key]
@@ -123,75 +198,108 @@ class PieceManager:
             }
 
     class Rook(Piece):
+        __slots__ = ()
+        sym = "T"
+        directions = ORTHOGONAL
+
         def __init__(self, color: Literal["white", "black"] = "black"):
             super().__init__(
-                possible_pos=gen_possible_pos_tower(),
-                possible_strikes=gen_possible_pos_tower(),
+                possible_pos=ROOK_POSSIBLE_POS,
+                possible_strikes=ROOK_POSSIBLE_POS,
                 color=color,
             )
-            self.sym = "T"
 
     class Knight(Piece):
+        __slots__ = ()
+        sym = "N"
+
         def __init__(self, color: Literal["white", "black"] = "black"):
             super().__init__(
-                possible_pos=gen_possible_pos_knight(),
-                possible_strikes=gen_possible_pos_knight(),
+                possible_pos=KNIGHT_POSSIBLE_POS,
+                possible_strikes=KNIGHT_POSSIBLE_POS,
                 color=color,
                 can_jump=True,
             )
-            self.sym = "N"
-            self.moved = False
 
     class Bishop(Piece):
+        __slots__ = ()
+        sym = "B"
+        directions = DIAGONAL
+
         def __init__(self, color: Literal["white", "black"] = "black"):
             super().__init__(
-                possible_pos=gen_possible_pos_bishop(),
-                possible_strikes=gen_possible_pos_bishop(),
+                possible_pos=BISHOP_POSSIBLE_POS,
+                possible_strikes=BISHOP_POSSIBLE_POS,
                 color=color,
             )
-            self.sym = "B"
 
     class Queen(Piece):
+        __slots__ = ()
+        sym = "Q"
+        directions = ORTHOGONAL + DIAGONAL
+
         def __init__(self, color: Literal["white", "black"] = "black"):
             super().__init__(
-                possible_pos=gen_possible_pos_tower() + gen_possible_pos_bishop(),
-                possible_strikes=gen_possible_pos_tower() + gen_possible_pos_bishop(),
+                possible_pos=QUEEN_POSSIBLE_POS,
+                possible_strikes=QUEEN_POSSIBLE_POS,
                 color=color,
             )
-            self.sym = "Q"
 
     class King(Piece):
+        __slots__ = ()
+        sym = "K"
+
         def __init__(self, color: Literal["white", "black"] = "black"):
             super().__init__(
-                possible_pos=gen_possible_pos_king(),
-                possible_strikes=gen_possible_pos_king(),
+                possible_pos=KING_POSSIBLE_POS,
+                possible_strikes=KING_POSSIBLE_POS,
                 color=color,
             )
-            self.sym = "K"
-            self.moved = False
 
     class Pawn(Piece):
+        __slots__ = ()
+        sym = "P"
+
         def __init__(self, color: Literal["white", "black"] = "black"):
             super().__init__(
-                possible_pos=[(-1, 0), (-2, 0)],
-                possible_strikes=[(-1, 1), (-1, -1)],
+                possible_pos=PAWN_POSSIBLE_POS,
+                possible_strikes=PAWN_POSSIBLE_STRIKES,
                 color=color,
             )
-            self.sym = "P"
-            self.moved = False
+
+        @property
+        def possible_pos(self) -> tuple[tuple[int, int], ...]:
+            # the double step is gone once the pawn moved
+            if self.moved:
+                return self.kind.possible_pos[:1]
+            return self.kind.possible_pos
 
         def en_passant(self) -> dict[tuple[int, int], tuple[int, int]]:
             """returns a dict containing the pos were the pawn would move as key
             and the pos the pawn would strike as value"""
-            if self.color == "white":
-                pos_dict = {
-                    self.possible_strikes[0]: (self.cur_pos[0], self.cur_pos[1] + 1),
-                    self.possible_strikes[1]: (self.cur_pos[0], self.cur_pos[1] - 1),
-                }
-            else:
-                pos_dict = {
-                    self.possible_strikes[0]: (self.cur_pos[0], self.cur_pos[1] - 1),
-                    self.possible_strikes[1]: (self.cur_pos[0], self.cur_pos[1] + 1),
-                }
+            row, col = self.cur_pos
+            pos_dict = {
+                (row + y, col + x): (row, col + x) for y, x in self.possible_strikes
+            }
 
             return pos_dict
+
+    def new_piece(self, sym: str, color: Literal["white", "black"]) -> Piece:
+        """
+        :param sym: symbol of the piece (e.g. T for a Rook)
+        :returns: a new piece of the type with the symbol
+        """
+        match sym:
+            case "T":
+                return self.Rook(color=color)
+            case "N":
+                return self.Knight(color=color)
+            case "B":
+                return self.Bishop(color=color)
+            case "Q":
+                return self.Queen(color=color)
+            case "K":
+                return self.King(color=color)
+            case "P":
+                return self.Pawn(color=color)
+        raise ValueError(f"Unknown piece symbol {sym}")
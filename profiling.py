@@ -0,0 +1,198 @@
+import functools
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Callable, TextIO
+from game import Game, GameBoard
+
+# methods that are timed when profiling is enabled, by class
+PROFILED_METHODS: dict[type, tuple[str, ...]] = {
+    GameBoard: (
+        "move_piece",
+        "make_move",
+        "unmake_move",
+        "update_piece_arrays",
+        "update_outdated_arrays",
+        "update_color_kill_arrays",
+    ),
+    Game: (
+        "move_piece",
+        "make_move",
+        "get_piece_possible_moves",
+        "get_legal_moves",
+        "all_players_can_move",
+        "get_status",
+        "game_end",
+    ),
+}
+
+
+class PhaseStats:
+    """
+    counters of one profiled method, times include the methods it calls
+    """
+
+    __slots__ = ("calls", "seconds", "max_seconds", "allocated")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        # bytes still allocated when the calls returned, only counted with track_allocations
+        self.allocated = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "seconds": self.seconds,
+            "max_seconds": self.max_seconds,
+            "mean_seconds": self.seconds / self.calls if self.calls else 0.0,
+            "allocated": self.allocated,
+        }
+
+
+class Profiler:
+    """
+    opt-in timing of the rule methods, the methods are only wrapped while the profiler
+    is enabled, so a disabled profiler costs nothing
+    """
+
+    def __init__(self, methods: dict[type, tuple[str, ...]] = PROFILED_METHODS):
+        """
+        :param methods: methods to wrap, by class
+        """
+        self.methods = methods
+        self.stats: dict[str, PhaseStats] = {}
+        self.originals: dict[tuple[type, str], Callable] = {}
+        self.track_allocations = False
+        self.started_tracing = False
+        self.started = time.perf_counter()
+        self.report_thread: threading.Thread | None = None
+        self.report_stop = threading.Event()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.originals)
+
+    def wrap(self, name: str, method: Callable) -> Callable:
+        stats = self.stats.setdefault(name, PhaseStats())
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            track = self.track_allocations
+            if track:
+                memory = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                stats.calls += 1
+                stats.seconds += seconds
+                if seconds > stats.max_seconds:
+                    stats.max_seconds = seconds
+                if track:
+                    stats.allocated += tracemalloc.get_traced_memory()[0] - memory
+
+        return wrapper
+
+    def enable(self, track_allocations: bool = False):
+        """
+        :param track_allocations: also count allocated bytes with tracemalloc, this slows every call down
+        """
+        if self.enabled:
+            return
+        self.track_allocations = track_allocations
+        if track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        for cls, names in self.methods.items():
+            for name in names:
+                method = cls.__dict__.get(name)
+                if method is None:
+                    continue
+                self.originals[(cls, name)] = method
+                setattr(cls, name, self.wrap(f"{cls.__name__}.{name}", method))
+
+    def disable(self):
+        """
+        puts the original methods back, the counters are kept
+        """
+        for (cls, name), method in self.originals.items():
+            setattr(cls, name, method)
+        self.originals.clear()
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+        self.track_allocations = False
+        self.stop_report()
+
+    def reset(self):
+        for stats in self.stats.values():
+            stats.__init__()
+        self.started = time.perf_counter()
+
+    def snapshot(self) -> dict:
+        """
+        :returns: the counters of every profiled method and the seconds since the last reset
+        """
+        return {
+            "enabled": self.enabled,
+            "seconds": time.perf_counter() - self.started,
+            "methods": {name: stats.to_dict() for name, stats in self.stats.items()},
+        }
+
+    def report(self, output: TextIO = sys.stderr):
+        """
+        writes the counters sorted by total time
+        """
+        snapshot = self.snapshot()
+        output.write(f"profile after {snapshot['seconds']:.1f}s\n")
+        methods = sorted(
+            snapshot["methods"].items(),
+            key=lambda item: item[1]["seconds"],
+            reverse=True,
+        )
+        for name, stats in methods:
+            if not stats["calls"]:
+                continue
+            line = (
+                f"{name:<32} calls {stats['calls']:>9} total {stats['seconds']:9.3f}s"
+                f" mean {1000 * stats['mean_seconds']:8.3f}ms"
+                f" max {1000 * stats['max_seconds']:8.3f}ms"
+            )
+            if self.track_allocations:
+                line += f" allocated {stats['allocated']:>11}B"
+            output.write(line + "\n")
+        output.flush()
+
+    def start_report(self, interval: float, output: TextIO = sys.stderr):
+        """
+        writes a report every interval seconds from a daemon thread until the profiler is disabled
+        """
+        self.stop_report()
+        self.report_stop.clear()
+
+        def run():
+            while not self.report_stop.wait(interval):
+                self.report(output)
+
+        self.report_thread = threading.Thread(target=run, daemon=True)
+        self.report_thread.start()
+
+    def stop_report(self):
+        if self.report_thread is not None:
+            self.report_stop.set()
+            self.report_thread.join()
+            self.report_thread = None
+
+    def __enter__(self) -> "Profiler":
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+
+profiler = Profiler()
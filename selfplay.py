@@ -0,0 +1,210 @@
+import argparse
+import multiprocessing
+import os
+import random
+import time
+from collections import Counter
+from functools import partial
+from batch import GameBatch, Policy, random_policy
+from bitboard import square_to_pos
+from engine import PIECE_VALUES, SearchEngine
+from game import START_FEN, Game
+from moves import CAPTURE, EN_PASSANT, PROMOTION, move_flags, move_promotion, move_to
+
+POLICIES: tuple[str, ...] = ("random", "capture", "engine")
+
+
+def capture_policy(game: Game, moves: list[int], rng: random.Random) -> int:
+    """
+    plays the capture of the most valuable piece or the best promotion, a random move if there is none
+    """
+    board = game.board.board
+    game_size = game.game_size
+
+    def gain(move: int) -> int:
+        flags = move_flags(move)
+        value = 0
+        if flags & CAPTURE:
+            value += PIECE_VALUES[board[square_to_pos(move_to(move), game_size)].sym]
+        elif flags & EN_PASSANT:
+            value += PIECE_VALUES["P"]
+        if flags & PROMOTION:
+            value += PIECE_VALUES[move_promotion(move)]
+        return value
+
+    gains = [gain(move) for move in moves]
+    best = max(gains)
+    if best == 0:
+        return rng.choice(moves)
+    return rng.choice([move for move, value in zip(moves, gains) if value == best])
+
+
+def engine_policy(
+    game: Game, moves: list[int], rng: random.Random, depth: int = 1
+) -> int:
+    """
+    plays the best move of a search without transposition table
+    """
+    move = SearchEngine(game, hash_mb=0).search(max_depth=depth).move
+    return move if move is not None else rng.choice(moves)
+
+
+def get_policy(name: str, depth: int = 1) -> Policy:
+    """
+    :param name: one of POLICIES
+    :param depth: search depth of the engine policy
+    """
+    if name == "random":
+        return random_policy
+    if name == "capture":
+        return capture_policy
+    if name == "engine":
+        return partial(engine_policy, depth=depth)
+    raise ValueError(f"Unknown policy {name}, expected one of {', '.join(POLICIES)}")
+
+
+def play_games(task: tuple[int, int, str, str, int, int]) -> list[tuple[str, str, int]]:
+    """
+    runs in a worker and plays one batch of games in lockstep
+
+    :param task: (number of games, seed, fen, policy name, engine depth, max plies)
+    :returns: (result, end, plies) of every game
+    """
+    count, seed, fen, policy, depth, max_plies = task
+    batch = GameBatch.new(count, fen)
+    batch.playout(max_plies, random.Random(seed), get_policy(policy, depth))
+    return list(zip(batch.results, batch.ends, batch.plies.tolist()))
+
+
+def selfplay(
+    games: int,
+    processes: int | None = None,
+    batch_size: int = 16,
+    fen: str = START_FEN,
+    policy: str = "random",
+    depth: int = 1,
+    max_plies: int = 400,
+    seed: int | None = None,
+) -> dict:
+    """
+    plays games split into batches over a process pool
+
+    :param games: number of games
+    :param processes: worker processes, all cores if not given, 1 plays in this process
+    :param batch_size: games a worker plays in lockstep
+    :param fen: position every game starts from
+    :param policy: how moves are picked, one of POLICIES
+    :param depth: search depth of the engine policy
+    :param max_plies: plies after which a game is stopped without result
+    :param seed: seed of the move choices, the same seed plays the same games
+    :returns: statistics over all games
+    """
+    # bad arguments fail here and not in every worker
+    get_policy(policy)
+    Game.from_fen(fen)
+    seed = random.randrange(2**32) if seed is None else seed
+    tasks = []
+    for index, first in enumerate(range(0, games, batch_size)):
+        count = min(batch_size, games - first)
+        tasks.append((count, seed + index, fen, policy, depth, max_plies))
+
+    start = time.perf_counter()
+    processes = min(processes or os.cpu_count() or 1, len(tasks))
+    if processes <= 1:
+        batches = map(play_games, tasks)
+    else:
+        pool = multiprocessing.Pool(processes)
+        batches = pool.imap_unordered(play_games, tasks)
+
+    results = Counter()
+    ends = Counter()
+    plies = 0
+    try:
+        for batch in batches:
+            for result, end, game_plies in batch:
+                results[result] += 1
+                ends[end] += 1
+                plies += game_plies
+    finally:
+        if processes > 1:
+            pool.close()
+            pool.join()
+    seconds = time.perf_counter() - start
+
+    return {
+        "games": games,
+        "plies": plies,
+        "seconds": seconds,
+        "games_per_second": games / seconds if seconds else 0.0,
+        "plies_per_second": plies / seconds if seconds else 0.0,
+        "average_plies": plies / games if games else 0.0,
+        "results": dict(results),
+        "ends": dict(ends),
+    }
+
+
+def print_stats(stats: dict):
+    print(f"games {stats['games']} plies {stats['plies']} time {stats['seconds']:.2f}s")
+    print(
+        f"games/s {stats['games_per_second']:.2f} plies/s {stats['plies_per_second']:.0f}"
+        f" average plies {stats['average_plies']:.1f}"
+    )
+    games = stats["games"] or 1
+    for title, counts in (("results", stats["results"]), ("ends", stats["ends"])):
+        print(
+            f"{title} "
+            + " ".join(
+                f"{key} {value} ({100 * value / games:.1f}%)"
+                for key, value in sorted(counts.items())
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="play games without a board on screen and report throughput and results"
+    )
+    parser.add_argument("games", type=int, nargs="?", default=100)
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="worker processes, all cores if not given",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=16, help="games a worker plays in lockstep"
+    )
+    parser.add_argument("--policy", choices=POLICIES, default="random")
+    parser.add_argument(
+        "--depth", type=int, default=1, help="search depth of the engine policy"
+    )
+    parser.add_argument(
+        "--max-plies",
+        type=int,
+        default=400,
+        help="plies after which a game is stopped",
+    )
+    parser.add_argument(
+        "--fen", default=START_FEN, help="position every game starts from"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None, help="seed of the move choices"
+    )
+    args = parser.parse_args()
+
+    print_stats(
+        selfplay(
+            args.games,
+            processes=args.processes,
+            batch_size=args.batch_size,
+            fen=args.fen,
+            policy=args.policy,
+            depth=args.depth,
+            max_plies=args.max_plies,
+            seed=args.seed,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
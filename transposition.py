@@ -0,0 +1,122 @@
+import numpy as np
+
+# bound of a stored score
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# every bucket has two slots, the first keeps the deepest search of the positions that
+# fall into the bucket, the second always takes the newest one
+DEPTH_PREFERRED = 0
+ALWAYS_REPLACE = 1
+SLOTS = 2
+
+# key, score, move, depth, bound
+ENTRY_BYTES = 8 + 4 + 4 + 1 + 1
+
+
+class TranspositionTable:
+    """
+    fixed size store of searched positions keyed by the zobrist hash of the position,
+    the entries live in flat numpy arrays so the table never grows past its memory cap
+    """
+
+    def __init__(self, size_mb: float = 16):
+        """
+        :param size_mb: memory cap of the table in megabytes, the number of buckets is
+            the largest power of two that fits
+        """
+        self.size_mb = size_mb
+        max_buckets = max(1, int(size_mb * 1024 * 1024) // (ENTRY_BYTES * SLOTS))
+        self.buckets = 1 << (max_buckets.bit_length() - 1)
+        self.mask = self.buckets - 1
+
+        entries = self.buckets * SLOTS
+        self.keys = np.zeros(entries, dtype=np.uint64)
+        self.scores = np.zeros(entries, dtype=np.int32)
+        self.moves = np.zeros(entries, dtype=np.int32)
+        self.depths = np.full(entries, -1, dtype=np.int8)
+        self.bounds = np.zeros(entries, dtype=np.uint8)
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.keys.nbytes
+            + self.scores.nbytes
+            + self.moves.nbytes
+            + self.depths.nbytes
+            + self.bounds.nbytes
+        )
+
+    def probe(self, key: int) -> tuple[int, int, int, int] | None:
+        """
+        :param key: zobrist hash of the position
+        :returns: (depth, bound, score, move) of the position or None if it is not stored
+        """
+        index = (key & self.mask) * SLOTS
+        for slot in range(index, index + SLOTS):
+            if self.depths[slot] >= 0 and int(self.keys[slot]) == key:
+                self.hits += 1
+                return (
+                    int(self.depths[slot]),
+                    int(self.bounds[slot]),
+                    int(self.scores[slot]),
+                    int(self.moves[slot]),
+                )
+        self.misses += 1
+        return None
+
+    def store(self, key: int, depth: int, bound: int, score: int, move: int):
+        """
+        :param key: zobrist hash of the position
+        :param depth: remaining depth the position was searched with
+        :param bound: EXACT, LOWER or UPPER
+        :param score: score of the position
+        :param move: best packed move of the position or 0
+        """
+        index = (key & self.mask) * SLOTS
+        preferred = index + DEPTH_PREFERRED
+        if (
+            self.depths[preferred] < 0
+            or int(self.keys[preferred]) == key
+            or depth >= self.depths[preferred]
+        ):
+            slot = preferred
+        else:
+            slot = index + ALWAYS_REPLACE
+        # a search without a best move keeps the move of the older search of the position
+        if not move and int(self.keys[slot]) == key:
+            move = int(self.moves[slot])
+
+        self.keys[slot] = key
+        self.depths[slot] = min(depth, 127)
+        self.bounds[slot] = bound
+        self.scores[slot] = score
+        self.moves[slot] = move
+        self.stores += 1
+
+    def clear(self):
+        self.keys.fill(0)
+        self.depths.fill(-1)
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        :returns: size, fill and hit counters of the table
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": self.buckets * SLOTS,
+            "bytes": self.nbytes,
+            "used": int(np.count_nonzero(self.depths >= 0)),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,3 +1,7 @@
+import queue
+import threading
+import time
+from collections import OrderedDict
 import pygame
 from pygame._sdl2 import Window
 from game import Game
@@ -12,6 +16,13 @@ RATIO_SIZE = (1600, 900)
 
 FONT_SIZE_SCALE = 0.02
 
+# memory the scaled sprites may take, the least recently used ones are dropped first
+SPRITE_CACHE_BYTES = 64 * 1024 * 1024
+# loaded font sizes and rendered texts that are kept, the least recently used ones are dropped first
+FONT_CACHE_SIZE = 8
+TEXT_CACHE_SIZE = 128
+FONT_FILE = "freesansbold.ttf"
+
 BLACK = (0, 0, 0)
 LIGHT_GREY = (158, 158, 158)
 WHITE = (255, 255, 255)
@@ -22,6 +33,9 @@ DARK_BLUE = (11, 11, 255)
 LIGHT_BLUE = (138, 199, 219)
 GREEN = (50, 205, 50)
 
+# posted by the MoveWorker when a result is ready, wakes up the event loop
+WORKER_EVENT = pygame.event.custom_type()
+
 pygame.init()
 
 
@@ -33,7 +47,9 @@ def next_color(color) -> str:
 
 
 class ObjectManager:
-    def __init__(self, font_size: int = 36):
+    def __init__(
+        self, font_size: int = 36, sprite_cache_bytes: int = SPRITE_CACHE_BYTES
+    ):
         self.background_img = pygame.image.load("img/wood-591631_1920.jpg")
         self.setting_button_img = pygame.image.load("img/settings.png")
 
@@ -55,15 +71,20 @@ class ObjectManager:
         self.P_black = pygame.image.load("img/pieces/black-pawn.png")
         self.P_white = pygame.image.load("img/pieces/white-pawn.png")
 
+        # fonts by size and rendered texts by (text, size, color)
+        self.fonts: OrderedDict[int, pygame.font.Font] = OrderedDict()
+        self.texts: OrderedDict[tuple[str, int, tuple], pygame.Surface] = OrderedDict()
+
         self.font_size = font_size
+        self.big_font_size = self.font_size * 2
 
-        self.font = pygame.font.Font("freesansbold.ttf", self.font_size)
-        self.big_font = pygame.font.Font("freesansbold.ttf", self.font_size * 2)
+        self.font = self.get_font(self.font_size)
+        self.big_font = self.get_font(self.big_font_size)
 
         button_width = 180
         button_height = 50
 
-        self.fullscreen_font = self.font.render("Fullscreen", True, BLACK)
+        self.fullscreen_font = self.render_text("Fullscreen", self.font_size, BLACK)
         self.fullscreen_button = pygame.Rect(
             (RATIO_SIZE[0] - button_width) / 2,
             (RATIO_SIZE[1] - button_height) / 2 - 30,
@@ -71,7 +92,7 @@ class ObjectManager:
             button_height,
         )
 
-        self.exit_font = self.font.render("Exit", True, BLACK)
+        self.exit_font = self.render_text("Exit", self.font_size, BLACK)
         self.exit_button = pygame.Rect(
             (RATIO_SIZE[0] - button_width) / 2,
             (RATIO_SIZE[1] - button_height) / 2 + 30,
@@ -79,7 +100,7 @@ class ObjectManager:
             button_height,
         )
 
-        self.windowed_font = self.font.render("Windowed", True, BLACK)
+        self.windowed_font = self.render_text("Windowed", self.font_size, BLACK)
         self.windowed_button = self.fullscreen_button.copy()
 
         self.setting_button = pygame.transform.scale(self.setting_button_img, (40, 40))
@@ -90,22 +111,105 @@ class ObjectManager:
 
         self.tile = pygame.Rect(self.board_boarder[0], self.board_boarder[1], 100, 100)
 
-        self.white_player_font = self.font.render("White player", True, BLACK)
-        self.black_player_font = self.font.render("Black player", True, BLACK)
+        self.white_player_font = self.render_text("White player", self.font_size, BLACK)
+        self.black_player_font = self.render_text("Black player", self.font_size, BLACK)
 
-        self.game_over_font = self.big_font.render("", True, RED)
+        self.game_over_font = self.render_text("", self.big_font_size, RED)
+
+        # scaled and converted images by (attribute name of the image, size)
+        self.sprites: OrderedDict[tuple[str, tuple[int, int]], pygame.Surface] = (
+            OrderedDict()
+        )
+        self.sprite_cache_bytes = sprite_cache_bytes
+        self.sprites_bytes = 0
+
+    def get_sprite(self, name: str, size: tuple[int, int]) -> pygame.Surface:
+        """
+        scales an image once per size and converts it to the pixel format of the screen
+        :param name: attribute name of the image, e.g. background_img or K_white
+        :param size: size of the scaled image
+        :returns: the scaled image, shared between all callers
+        """
+        key = (name, tuple(size))
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.sprites.move_to_end(key)
+            return sprite
+
+        image: pygame.Surface = getattr(self, name)
+        sprite = pygame.transform.scale(image, key[1])
+        if pygame.display.get_surface() is not None:
+            # the background has no transparent pixels
+            sprite = (
+                sprite.convert() if name == "background_img" else sprite.convert_alpha()
+            )
+
+        self.sprites[key] = sprite
+        self.sprites_bytes += (
+            sprite.get_width() * sprite.get_height() * sprite.get_bytesize()
+        )
+        while self.sprites_bytes > self.sprite_cache_bytes and len(self.sprites) > 1:
+            _, dropped = self.sprites.popitem(last=False)
+            self.sprites_bytes -= (
+                dropped.get_width() * dropped.get_height() * dropped.get_bytesize()
+            )
+        return sprite
+
+    def clear_sprites(self):
+        """
+        drops all scaled images, used when the window size changes
+        """
+        self.sprites.clear()
+        self.sprites_bytes = 0
+
+    def get_font(self, font_size: int) -> pygame.font.Font:
+        """
+        :param font_size: size of the font
+        :returns: the font of that size, only loaded from the file the first time
+        """
+        font = self.fonts.get(font_size)
+        if font is not None:
+            self.fonts.move_to_end(font_size)
+            return font
+
+        font = pygame.font.Font(FONT_FILE, font_size)
+        self.fonts[font_size] = font
+        if len(self.fonts) > FONT_CACHE_SIZE:
+            self.fonts.popitem(last=False)
+        return font
+
+    def render_text(self, text: str, font_size: int, color: tuple) -> pygame.Surface:
+        """
+        :param text: text to render
+        :param font_size: size of the font
+        :param color: color of the text
+        :returns: the rendered text, shared between all callers
+        """
+        key = (text, font_size, tuple(color))
+        surface = self.texts.get(key)
+        if surface is not None:
+            self.texts.move_to_end(key)
+            return surface
+
+        surface = self.get_font(font_size).render(text, True, color)
+        self.texts[key] = surface
+        if len(self.texts) > TEXT_CACHE_SIZE:
+            self.texts.popitem(last=False)
+        return surface
 
     def render_fonts(self, font_size: int):
         """
-        :param font_size: New font size
+        :param font_size: New font size, nothing is rendered if it didn't change
         """
+        if font_size == self.font_size:
+            return
         self.font_size = font_size
 
-        self.font = pygame.font.Font("freesansbold.ttf", self.font_size)
+        self.font = self.get_font(self.font_size)
 
-        self.fullscreen_font = self.font.render("Fullscreen", True, BLACK)
-        self.exit_font = self.font.render("Exit", True, BLACK)
-        self.windowed_font = self.font.render("Windowed", True, BLACK)
+        self.fullscreen_font = self.render_text("Fullscreen", self.font_size, BLACK)
+        self.exit_font = self.render_text("Exit", self.font_size, BLACK)
+        self.windowed_font = self.render_text("Windowed", self.font_size, BLACK)
 
     def render_cur_player_fonts(
         self, cur_player_color: Literal["white", "black"] = "white"
@@ -115,11 +219,17 @@ class ObjectManager:
         :param cur_player_color: color of current player
         """
         if cur_player_color == "white":
-            self.white_player_font = self.font.render("White player", True, GREEN)
-            self.black_player_font = self.font.render("Black player", True, RED)
+            white_color, black_color = GREEN, RED
         elif cur_player_color == "black":
-            self.white_player_font = self.font.render("White player", True, RED)
-            self.black_player_font = self.font.render("Black player", True, GREEN)
+            white_color, black_color = RED, GREEN
+        else:
+            return
+        self.white_player_font = self.render_text(
+            "White player", self.font_size, white_color
+        )
+        self.black_player_font = self.render_text(
+            "Black player", self.font_size, black_color
+        )
 
     def render_game_over_font(self, lost_color: Literal["white", "black", "none"]):
         if lost_color == "white":
@@ -128,9 +238,11 @@ class ObjectManager:
             won = "white"
 
         if lost_color == "none":
-            self.game_over_font = self.big_font.render("Draw", True, RED)
+            self.game_over_font = self.render_text("Draw", self.big_font_size, RED)
         else:
-            self.game_over_font = self.big_font.render(f"{won} player won", True, RED)
+            self.game_over_font = self.render_text(
+                f"{won} player won", self.big_font_size, RED
+            )
 
 
 om = ObjectManager()
@@ -183,9 +295,9 @@ class Frame(pygame.surface.Surface):
         """
         renders the frame and updates attributes to fit screen size
         """
+        self.calculate_rect()
         font_size = int(self.rect.width * FONT_SIZE_SCALE)
         om.render_fonts(font_size)
-        self.calculate_rect()
 
         if TEST:
             pygame.draw.rect(self.screen, WHITE, self.rect)
@@ -262,6 +374,25 @@ class Tile:
         self.cur_color = self.normal_color_code
         self.content = None
         self.rect = pygame.Rect(0, 0, 0, 0)
+        # state of the tile when it was drawn the last time, None if it has to be drawn
+        self.drawn_state = None
+
+    def get_state(self) -> tuple:
+        """
+        :returns: everything that changes how the tile looks
+        """
+        content = None
+        if self.content is not None:
+            content = (self.content.sym, self.content.color)
+        return self.cur_color, content, tuple(self.rect)
+
+    def draw(self):
+        """
+        draws the tile with its content and remembers what was drawn
+        """
+        pygame.draw.rect(self.screen, self.cur_color, self.rect)
+        self.load_content()
+        self.drawn_state = self.get_state()
 
     def load_content(self):
         """
@@ -269,8 +400,7 @@ class Tile:
         """
         if self.content is not None:
             img_code = f"{self.content.sym}_{self.content.color}"
-            piece_img: pygame.Surface = getattr(om, img_code)
-            piece_img_scaled = pygame.transform.scale(piece_img, self.rect.size)
+            piece_img_scaled = om.get_sprite(img_code, self.rect.size)
             piece_rect = piece_img_scaled.get_rect()
             piece_rect.center = self.rect.center
             self.screen.blit(piece_img_scaled, piece_rect)
@@ -290,6 +420,10 @@ class GameFrame(Frame):
         self.white_player_rect = pygame.Rect(0, 0, 0, 0)
         self.black_player_rect = pygame.Rect(0, 0, 0, 0)
 
+        # what the last drawn frame showed, to only draw what changed since
+        self.drawn_player: str | None = None
+        self.drawn_killed = (0, 0)
+
     def setup_tiles(self):
         """
         generates tiles for the board and populates tiles attribute
@@ -332,9 +466,21 @@ class GameFrame(Frame):
         """
         self.resize_tiles()
         for tile in self.tiles:
-            pygame.draw.rect(self.screen, tile.cur_color, tile.rect)
             tile.content = self.game.board.board[tile.cords]
-            tile.load_content()
+            tile.draw()
+
+    def update_tiles(self) -> list[pygame.Rect]:
+        """
+        draws the tiles whose piece or highlight changed since they were drawn
+        :returns: rectangles of the drawn tiles
+        """
+        rects = []
+        for tile in self.tiles:
+            tile.content = self.game.board.board[tile.cords]
+            if tile.get_state() != tile.drawn_state:
+                tile.draw()
+                rects.append(tile.rect)
+        return rects
 
     def load_boarder(self):
         """
@@ -393,10 +539,13 @@ class GameFrame(Frame):
             pygame.draw.rect(self.screen, BLACK, tile.rect, 1)
             tile.load_content()
 
-    def load_players(self):
+    def load_players(self) -> list[pygame.Rect]:
         """
         blits the players on the screen to show witch turn it is
+        :returns: rectangles of the player labels
         """
+        om.render_cur_player_fonts(self.game.cur_player.color)
+
         self.white_player_rect = om.white_player_font.get_rect()
         self.white_player_rect.center = (RATIO_SIZE[0] * (1 / 8), RATIO_SIZE[1] / 25)
         self.white_player_rect = self.calc_element_rect(self.white_player_rect)
@@ -405,8 +554,6 @@ class GameFrame(Frame):
         self.black_player_rect.center = (RATIO_SIZE[0] * (7 / 8), RATIO_SIZE[1] / 25)
         self.black_player_rect = self.calc_element_rect(self.black_player_rect)
 
-        om.render_cur_player_fonts(self.game.cur_player.color)
-
         background_white_rect = pygame.Rect(
             self.white_player_rect.x,
             self.white_player_rect.y,
@@ -427,55 +574,41 @@ class GameFrame(Frame):
         pygame.draw.rect(self.screen, WHITE, background_black_rect)
         self.screen.blit(om.black_player_font, self.black_player_rect)
 
-    def load_killed_pieces(self):
+        self.drawn_player = self.game.cur_player.color
+        return [background_white_rect, background_black_rect]
+
+    def load_killed_pieces(self, drawn: tuple[int, int] = (0, 0)) -> list[pygame.Rect]:
+        """
+        blits the killed pieces under the player labels, four in a row
+        :param drawn: number of killed white and black pieces that are already on the screen
+        :returns: rectangles of the drawn pieces
+        """
         tile_width = self.tiles[0].rect.width * (3 / 4)
         tile_height = self.tiles[0].rect.height * (3 / 4)
 
-        cur_row = 0
-        cur_col = 0
-
-        start_x = self.white_player_rect.center[0] - 2 * tile_width
-        start_y = self.white_player_rect.center[1] + self.board_rect.height * (1 / 25)
-
-        for piece in self.game.killed_white:
-            tile = Tile(self.screen, x=cur_col, y=cur_row, color="white")
-            tile.rect = pygame.Rect(
-                start_x + (cur_col * tile_width),
-                start_y + (cur_row * tile_height),
-                tile_width,
-                tile_height,
-            )
-            tile.content = piece
-            tile.load_content()
-
-            if cur_col == 3:
-                cur_col = 0
-                cur_row += 1
-            else:
-                cur_col += 1
-
-        cur_row = 0
-        cur_col = 0
-
-        start_x = self.black_player_rect.center[0] - 2 * tile_width
-        start_y = self.black_player_rect.center[1] + self.board_rect.height * (1 / 25)
-
-        for piece in self.game.killed_black:
-            tile = Tile(self.screen, x=cur_col, y=cur_row, color="black")
-            tile.rect = pygame.Rect(
-                start_x + (cur_col * tile_width),
-                start_y + (cur_row * tile_height),
-                tile_width,
-                tile_height,
-            )
-            tile.content = piece
-            tile.load_content()
-
-            if cur_col == 3:
-                cur_col = 0
-                cur_row += 1
-            else:
-                cur_col += 1
+        rects = []
+        for killed, player_rect, color, first in (
+            (self.game.killed_white, self.white_player_rect, "white", drawn[0]),
+            (self.game.killed_black, self.black_player_rect, "black", drawn[1]),
+        ):
+            start_x = player_rect.center[0] - 2 * tile_width
+            start_y = player_rect.center[1] + self.board_rect.height * (1 / 25)
+
+            for index in range(first, len(killed)):
+                cur_row, cur_col = divmod(index, 4)
+                tile = Tile(self.screen, x=cur_col, y=cur_row, color=color)
+                tile.rect = pygame.Rect(
+                    start_x + (cur_col * tile_width),
+                    start_y + (cur_row * tile_height),
+                    tile_width,
+                    tile_height,
+                )
+                tile.content = killed[index]
+                tile.load_content()
+                rects.append(tile.rect)
+
+        self.drawn_killed = (len(self.game.killed_white), len(self.game.killed_black))
+        return rects
 
     def load_frame(self):
         """
@@ -489,16 +622,150 @@ class GameFrame(Frame):
         if self.pawn_reached_end:
             self.show_select_field(self.game.cur_player.color)
 
+    def update_frame(self) -> list[pygame.Rect] | None:
+        """
+        draws only the parts of the frame that changed since the last drawn frame
+        :returns: rectangles that changed on the screen, None if the whole frame has to be drawn
+        """
+        killed = (len(self.game.killed_white), len(self.game.killed_black))
+        if killed < self.drawn_killed:
+            return None
+
+        rects = self.update_tiles()
+        if rects:
+            # the boarder lies on the outer tiles
+            self.load_boarder()
+        if self.game.cur_player.color != self.drawn_player:
+            rects += self.load_players()
+        if killed != self.drawn_killed:
+            rects += self.load_killed_pieces(self.drawn_killed)
+        return rects
+
+
+class MoveWorker(threading.Thread):
+    """
+    selects pieces, plays moves and checks the end of the game next to the ui thread,
+    the ui thread only reads the game while no job is pending and gets the results through a queue
+    """
+
+    def __init__(self, game_frame: GameFrame):
+        super().__init__(daemon=True)
+        self.game_frame = game_frame
+        self.jobs: queue.Queue = queue.Queue()
+        self.results: queue.Queue = queue.Queue()
+        # jobs without a result taken by poll, only changed by the ui thread
+        self.pending = 0
+
+        # selected piece and pawn to change of the game, owned by the worker while it runs
+        self.selected_pos: tuple[int, int] | None = None
+        self.promotion_pos: tuple[int, int] | None = None
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            try:
+                result = self.handle(*job)
+            except Exception as error:
+                result = {"error": error}
+            self.results.put(result)
+            if pygame.display.get_init():
+                pygame.event.post(pygame.event.Event(WORKER_EVENT))
+
+    def submit(self, kind: Literal["click", "promote"], value):
+        """
+        :param kind: click on the tile at value or promote the pawn to the symbol value
+        """
+        self.pending += 1
+        self.jobs.put((kind, value))
+
+    def busy(self) -> bool:
+        return self.pending > 0
+
+    def poll(self) -> list[dict]:
+        """
+        :returns: the results that are ready, in the order of the jobs
+        """
+        results = []
+        while True:
+            try:
+                results.append(self.results.get_nowait())
+            except queue.Empty:
+                return results
+            self.pending -= 1
+
+    def stop(self):
+        self.jobs.put(None)
+        self.join()
+
+    def handle(self, kind: Literal["click", "promote"], value) -> dict:
+        """
+        runs one job in the worker thread, the same rules as UiBrain.select_piece,
+        UiBrain.try_move_selected_piece and EventManager.check_change_pawn
+        :returns: what the ui has to show, pieces are passed so the ui doesn't read the board
+        """
+        game = self.game_frame.game
+        board = game.board.board
+        result = {"select": None, "moved": False, "promotion": None, "promoted": False}
+
+        if kind == "click" and self.promotion_pos is None:
+            piece = board[value]
+            if piece is not None and piece.color == game.cur_player.color:
+                self.selected_pos = value
+                result["select"] = (piece, game.get_piece_possible_moves(piece))
+            elif self.selected_pos is not None:
+                selected = board[self.selected_pos]
+                if value in game.get_piece_possible_moves(selected):
+                    game.move_piece(self.selected_pos, value)
+                    self.selected_pos = None
+                    result["moved"] = True
+                    if game.board.pawn_reached_end(value):
+                        self.promotion_pos = value
+                        result["promotion"] = board[value]
+                    else:
+                        game.next_player()
+        elif kind == "promote" and self.promotion_pos is not None:
+            game.board.replace_pawn(board[self.promotion_pos], value)
+            self.promotion_pos = None
+            game.next_player()
+            result["promoted"] = True
+
+        result["game_over"] = game.game_end()
+        return result
+
 
 class UiBrain:
-    def __init__(self):
+    def __init__(
+        self,
+        tickrate: int = 60,
+        idle_tickrate: int = 2,
+        show_stats: bool = False,
+        move_worker: bool = True,
+    ):
+        """
+        :param tickrate: most frames drawn per second
+        :param idle_tickrate: times per second the ui wakes up without events, 0 sleeps until the next event
+        :param show_stats: draw the frame rate in the bottom left corner
+        :param move_worker: compute moves and the end of the game in a MoveWorker thread
+        """
         self.screen = pygame.display.set_mode(
             WINDOW_SIZE, pygame.DOUBLEBUF | pygame.RESIZABLE
         )
         Window.from_display_module().maximize()
 
         self.clock = pygame.time.Clock()
-        self.tickrate = 60
+        self.tickrate = tickrate
+        self.idle_tickrate = idle_tickrate
+        self.running = True
+
+        # loops, drawn frames and handled events since the start, fps of the last second
+        self.show_stats = show_stats
+        self.stats = {"loops": 0, "frames": 0, "events": 0, "fps": 0.0}
+        self.stats_start = time.perf_counter()
+        self.stats_frames = 0
+        self.stats_rect = pygame.Rect(0, 0, 0, 0)
+        self.drawn_stats = ""
 
         self.selected_piece: pieces.Piece = pieces.Piece(
             possible_pos=[], possible_strikes=[], color="white"
@@ -516,6 +783,17 @@ class UiBrain:
 
         self.game_over = False
 
+        # the whole screen is drawn again if set or the view changed since the last frame
+        self.full_redraw = True
+        self.drawn_view: tuple | None = None
+
+        # clicked tiles whose result the MoveWorker hasn't sent yet
+        self.pending_tiles: list[Tile] = []
+        self.move_worker: MoveWorker | None = None
+        if move_worker:
+            self.move_worker = MoveWorker(self.game_frame)
+            self.move_worker.start()
+
     def resize_screen(self, size: tuple[int, int]):
         """
         resizes the screen if not in fullscreen
@@ -525,6 +803,7 @@ class UiBrain:
             self.screen = pygame.display.set_mode(
                 size, pygame.DOUBLEBUF | pygame.RESIZABLE
             )
+            om.clear_sprites()
         self.toggle = False
 
     def update_background(self):
@@ -532,8 +811,7 @@ class UiBrain:
         blits the background image on the screen
         """
         self.screen.blit(
-            pygame.transform.scale(om.background_img, self.screen.get_rect().size),
-            (0, 0),
+            om.get_sprite("background_img", self.screen.get_size()), (0, 0)
         )
 
     def toggle_fullscreen(self):
@@ -552,6 +830,7 @@ class UiBrain:
             )
             self.setting_frame.window_type = "window"
             Window.from_display_module().maximize()
+        om.clear_sprites()
         self.toggle = True
 
     def load_setting_button(self):
@@ -559,7 +838,7 @@ class UiBrain:
         blits the setting button on the screen to reach the game settings
         """
         rect = self.cur_frame.calc_element_rect(om.setting_button.get_rect())
-        setting_button_scaled = pygame.transform.scale(om.setting_button_img, rect[-2:])
+        setting_button_scaled = om.get_sprite("setting_button_img", rect[-2:])
         self.screen.blit(setting_button_scaled, (4, 4))
         self.setting_button_rect = pygame.Rect((4, 4) + tuple(rect[-2:]))
 
@@ -570,7 +849,7 @@ class UiBrain:
             ) or self.setting_frame.windowed_button.collidepoint(pos):
                 self.toggle_fullscreen()
             if self.setting_frame.exit_button.collidepoint(pos):
-                pygame.quit()
+                self.running = False
 
     def switch_setting_frame(self):
         """
@@ -618,6 +897,91 @@ class UiBrain:
                 if not self.game_frame.pawn_reached_end:
                     self.game_frame.game.next_player()
 
+    def click_tile(self, tile: Tile):
+        """
+        selects the piece on the tile or moves the selected piece there, in the MoveWorker if there is one
+        """
+        if self.move_worker is None:
+            self.select_piece(tile.cords)
+            self.try_move_selected_piece(tile.cords)
+            self.game_over = self.game_frame.game.game_end()
+            return
+        self.move_worker.submit("click", tile.cords)
+        self.pending_tiles.append(tile)
+
+    def change_pawn(self, sym: str):
+        """
+        changes the pawn on the last row into the piece with the symbol, in the MoveWorker if there is one
+        """
+        if self.move_worker is None:
+            self.game_frame.game.board.replace_pawn(
+                self.game_frame.changeable_pawn, sym
+            )
+            self.game_frame.pawn_reached_end = False
+            self.game_frame.game.next_player()
+            self.game_over = self.game_frame.game.game_end()
+            return
+        self.move_worker.submit("promote", sym)
+
+    def apply_worker_results(self):
+        """
+        shows the results of the MoveWorker, the board is not read here because the worker may
+        already run the next job
+        """
+        if self.move_worker is None:
+            return
+        for result in self.move_worker.poll():
+            if "error" in result:
+                raise result["error"]
+            if result["select"] is not None:
+                piece, moves = result["select"]
+                self.selected_piece = piece
+                for tile in self.game_frame.tiles:
+                    if tile.cords in moves:
+                        tile.cur_color = tile.sub_color_code
+                    else:
+                        tile.cur_color = tile.normal_color_code
+            if result["moved"]:
+                self.unselect_all()
+            if result["promotion"] is not None:
+                self.game_frame.pawn_reached_end = True
+                self.game_frame.changeable_pawn = result["promotion"]
+            if result["promoted"]:
+                self.game_frame.pawn_reached_end = False
+            self.game_over = result["game_over"]
+
+    def load_pending(self) -> list[pygame.Rect]:
+        """
+        marks the clicked tiles whose result is not there yet
+        :returns: rectangles that changed on the screen
+        """
+        rects = []
+        if self.cur_frame != self.game_frame:
+            return rects
+        for tile in self.pending_tiles:
+            if tile.drawn_state is None:
+                continue
+            pygame.draw.rect(self.screen, GREEN, tile.rect, 3)
+            # the tile is drawn again without the mark when the result is there
+            tile.drawn_state = None
+            rects.append(tile.rect)
+        return rects
+
+    def new_game(self):
+        """
+        starts a new game, waits for the jobs of the MoveWorker
+        """
+        while self.move_worker is not None and self.move_worker.busy():
+            self.apply_worker_results()
+            time.sleep(0.001)
+        self.game_frame.game = Game()
+        self.game_frame.pawn_reached_end = False
+        self.game_over = False
+        self.unselect_all()
+        if self.move_worker is not None:
+            self.move_worker.selected_pos = None
+            self.move_worker.promotion_pos = None
+
     def unselect_all(self):
         """
         unselects all pieces
@@ -637,17 +1001,136 @@ class UiBrain:
         self.screen.blit(om.game_over_font, text_rect)
         self.game_over = True
 
-    def mainloop(self):
+    def get_view(self) -> tuple:
+        """
+        :returns: everything that needs the whole screen to be drawn again when it changes
+        """
+        return (
+            self.cur_frame,
+            self.screen.get_size(),
+            self.setting_frame.window_type,
+            self.game_frame.pawn_reached_end,
+            self.game_over,
+        )
+
+    def redraw(self):
         """
-        mainloop of the ui
+        draws the whole screen
         """
+        self.update_background()
         self.cur_frame.load_frame()
         if self.game_over:
             self.load_game_over()
 
         self.load_setting_button()
-        pygame.display.flip()
-        self.clock.tick(self.tickrate)
+        self.full_redraw = False
+        self.drawn_view = self.get_view()
+
+    def update_stats(self):
+        """
+        counts the loop and measures the frames drawn per second once a second
+        """
+        self.stats["loops"] += 1
+        now = time.perf_counter()
+        if now - self.stats_start >= 1:
+            self.stats["fps"] = (self.stats["frames"] - self.stats_frames) / (
+                now - self.stats_start
+            )
+            self.stats_start = now
+            self.stats_frames = self.stats["frames"]
+
+    def load_stats(self, force: bool = False) -> list[pygame.Rect]:
+        """
+        blits the frame rate in the bottom left corner if it changed
+        :param force: blit it even if it didn't change, used after the whole screen was drawn
+        :returns: rectangles that changed on the screen
+        """
+        text = f"{self.stats['fps']:.1f} fps"
+        if text == self.drawn_stats and not force:
+            return []
+
+        old_rect = self.stats_rect
+        if not force:
+            background = om.get_sprite("background_img", self.screen.get_size())
+            self.screen.blit(background, old_rect, area=old_rect)
+
+        surface = om.render_text(text, om.font_size, WHITE)
+        self.stats_rect = surface.get_rect(bottomleft=(4, self.screen.get_height() - 4))
+        self.screen.blit(surface, self.stats_rect)
+        self.drawn_stats = text
+        return [old_rect.union(self.stats_rect)]
+
+    def mainloop(self) -> bool:
+        """
+        mainloop of the ui, draws only what changed and nothing if the screen is up to date
+        :returns: True if anything was drawn
+        """
+        self.update_stats()
+        self.apply_worker_results()
+        if self.move_worker is not None and self.move_worker.busy():
+            # the worker changes the game, only the pending clicks are drawn
+            rects = self.load_pending()
+            if self.show_stats:
+                rects += self.load_stats()
+            if not rects:
+                return False
+            pygame.display.update(rects)
+            self.stats["frames"] += 1
+            return True
+        self.pending_tiles.clear()
+
+        rects = []
+        if not self.full_redraw and self.get_view() == self.drawn_view:
+            if self.cur_frame == self.game_frame:
+                rects = self.game_frame.update_frame()
+                # the game over text lies on top of the board
+                if rects and self.game_over:
+                    rects = None
+
+        if rects is None or self.full_redraw or self.get_view() != self.drawn_view:
+            self.redraw()
+            if self.show_stats:
+                self.load_stats(force=True)
+            pygame.display.flip()
+        else:
+            if self.show_stats:
+                rects += self.load_stats()
+            if not rects:
+                return False
+            pygame.display.update(rects)
+
+        self.stats["frames"] += 1
+        return True
+
+    def wait_events(self) -> list[pygame.event.Event]:
+        """
+        sleeps until there is an event or the idle time is over, then takes all waiting events
+        :returns: the events, empty if the ui woke up without an event
+        """
+        timeout = 1000 // self.idle_tickrate if self.idle_tickrate > 0 else 0
+        event = pygame.event.wait(timeout)
+        events = [] if event.type == pygame.NOEVENT else [event]
+        events += pygame.event.get()
+        self.stats["events"] += len(events)
+        return events
+
+    def run(self, event_manager: "EventManager", on_loop=None):
+        """
+        event driven mainloop, draws at most tickrate frames per second and only after
+        something changed, without events it sleeps
+        :param event_manager: handles the events
+        :param on_loop: called before every loop, e.g. to post events in a soak test
+        """
+        while self.running:
+            if on_loop is not None:
+                on_loop()
+            event_manager.manage_events(self.wait_events())
+            if not self.running:
+                break
+            if self.mainloop():
+                self.clock.tick(self.tickrate)
+        if self.move_worker is not None:
+            self.move_worker.stop()
 
 
 class EventManager:
@@ -679,11 +1162,19 @@ class EventManager:
 
     def check_quit(self):
         if self.cur_event.type == pygame.QUIT:
-            pygame.quit()
+            self.ui.running = False
 
     def check_resize(self):
         if self.cur_event.type == pygame.VIDEORESIZE:
             self.ui.resize_screen(self.cur_event.size)
+        # the window content may be lost when the window is shown again
+        if self.cur_event.type in (
+            pygame.VIDEOEXPOSE,
+            pygame.WINDOWEXPOSED,
+            pygame.WINDOWRESTORED,
+            pygame.WINDOWSIZECHANGED,
+        ):
+            self.ui.full_redraw = True
 
     def check_return_to_game_frame(self):
         if self.cur_event.type == pygame.KEYDOWN:
@@ -695,21 +1186,21 @@ class EventManager:
         checks if setting buttons (e.g. fullscreen button) have been clicked and handles them appropriately
         """
         if self.cur_event.type == pygame.MOUSEBUTTONDOWN:
-            pos = pygame.mouse.get_pos()
+            pos = self.cur_event.pos
 
             if self.ui.setting_frame.fullscreen_button.collidepoint(
                 pos
             ) or self.ui.setting_frame.windowed_button.collidepoint(pos):
                 self.ui.toggle_fullscreen()
             if self.ui.setting_frame.exit_button.collidepoint(pos):
-                pygame.quit()
+                self.ui.running = False
 
     def check_options_button(self):
         """
         checks if the setting wheel has been clicked and opens or closes the settings window
         """
         if self.cur_event.type == pygame.MOUSEBUTTONDOWN:
-            pos = pygame.mouse.get_pos()
+            pos = self.cur_event.pos
 
             if self.ui.setting_button_rect.collidepoint(pos):
                 self.ui.switch_setting_frame()
@@ -720,23 +1211,17 @@ class EventManager:
         :return:
         """
         if self.cur_event.type == pygame.MOUSEBUTTONDOWN:
-            pos = pygame.mouse.get_pos()
+            pos = self.cur_event.pos
             for tile in self.ui.game_frame.tiles:
                 if tile.rect.collidepoint(pos):
-                    self.ui.select_piece(tile.cords)
-                    self.ui.try_move_selected_piece(tile.cords)
-                    self.ui.game_over = self.ui.game_frame.game.game_end()
+                    self.ui.click_tile(tile)
 
     def check_change_pawn(self):
         """
         checks if a piece from the select screen has been chosen and changes the pawn into the chosen piece
         """
         if self.cur_event.type == pygame.MOUSEBUTTONDOWN:
-            pos = pygame.mouse.get_pos()
+            pos = self.cur_event.pos
             for tile in self.ui.game_frame.change_tiles:
                 if tile.rect.collidepoint(pos):
-                    self.ui.game_frame.game.board.replace_pawn(
-                        self.ui.game_frame.changeable_pawn, tile.content.sym
-                    )
-                    self.ui.game_frame.pawn_reached_end = False
-                    self.ui.game_frame.game.next_player()
+                    self.ui.change_pawn(tile.content.sym)
@@ -0,0 +1,35 @@
+import random
+from functools import lru_cache
+from bitboard import COLORS, SYMBOLS
+
+ZOBRIST_SEED = 20251017
+
+
+class ZobristKeys:
+    """
+    random 64-bit keys for every part of a position, the hash of a position is the xor of the keys
+    of the pieces on their squares, the side to move (only xored in when black is to move),
+    the file of a pawn that can be struck en passant and the castling rights
+    """
+
+    def __init__(self, game_size: int, seed: int = ZOBRIST_SEED):
+        rng = random.Random(seed)
+        squares = game_size * game_size
+
+        self.pieces: dict[tuple[str, str], list[int]] = {
+            (color, sym): [rng.getrandbits(64) for _ in range(squares)]
+            for color in COLORS
+            for sym in SYMBOLS
+        }
+        self.black_to_move = rng.getrandbits(64)
+        self.en_passant_files = [rng.getrandbits(64) for _ in range(game_size)]
+        # one key per bit of GameBoard.get_castling_rights
+        self.castling = [rng.getrandbits(64) for _ in range(4)]
+
+
+@lru_cache(maxsize=None)
+def get_zobrist_keys(game_size: int) -> ZobristKeys:
+    """
+    :returns: the ZobristKeys for the board size, shared by every board of that size
+    """
+    return ZobristKeys(game_size)